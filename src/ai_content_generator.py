@@ -4,104 +4,309 @@ import requests
 import re
 import uuid
 import random
-from typing import Tuple, Optional
+import threading
+from typing import Callable, Dict, List, Tuple, Optional
 from deep_translator import GoogleTranslator
-from openai import AzureOpenAI
-from config import API_VERSION, AZURE_ENDPOINT, API_KEY, DALLE_API_VERSION
+from config import API_VERSION, DALLE_API_VERSION
+from animal_catalog import AnimalCatalog
+from artifact_store import ArtifactStore, artifact_key
+from client_registry import get_openai_client
+from combo_sampler import ComboSampler
+from history_store import HistoryStore
+from identifier_locks import IdentifierLocks
+from translation_cache import TranslationCache
 from logger import logger
 
 # Define base directory and file paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 JSON_FILE_PATH = os.path.join(BASE_DIR, "animals.json")
 HISTORY_FILE_PATH = os.path.join(BASE_DIR, "selected_animals.json")
+HISTORY_DB_PATH = os.path.join(BASE_DIR, "selected_animals.sqlite3")
+TRANSLATION_CACHE_PATH = os.path.join(BASE_DIR, "translation_cache.json")
+ARTIFACTS_DIR = os.path.join(BASE_DIR, "artifacts")
+RESERVATIONS_DIR = os.path.join(BASE_DIR, "reservations")
+
+MOODS = [
+    "šťastný", "smutný", "natěšený", "zvědavý", "ospalý", "nadšený",
+    "rozzlobený", "klidný", "roztržitý", "sebejistý", "nervózní",
+    "vystrašený", "zklamaný", "pyšný", "frustrovaný", "spokojený",
+    "zmatený", "nostalgický", "překvapený", "líný",
+]
+
+# Combinations currently being generated by this process (guards concurrent batch workers)
+_reserved_identifiers = set()
+_reservation_lock = threading.Lock()
+# The same reservations as lock files, so that other processes skip them as well
+identifier_locks = IdentifierLocks(RESERVATIONS_DIR)
+
+_history_store: Optional[HistoryStore] = None
+_combo_sampler: Optional[ComboSampler] = None
+_combo_sampler_version = 0
+
+animal_catalog = AnimalCatalog(JSON_FILE_PATH)
+translation_cache = TranslationCache(TRANSLATION_CACHE_PATH)
+artifact_store = ArtifactStore(ARTIFACTS_DIR)
+
+# GoogleTranslator keeps per-request state on the instance, so a translator serves one
+# request at a time; idle ones are pooled per language pair and shared by all threads
+_translators: Dict[Tuple[str, str], List[GoogleTranslator]] = {}
+_translators_lock = threading.Lock()
+
+# "full" re-sends and receives the whole story, "diff" only receives corrections,
+# "single_pass" lets the writer edit its own draft in the generation request
+VALIDATION_MODES = ("full", "diff", "single_pass")
+
+
+class TokenUsage:
+    """
+    Accumulates the token usage reported by non-streamed chat completions, per operation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage: Dict[str, Dict[str, int]] = {}
+
+    def add(self, operation: str, completion) -> None:
+        usage = getattr(completion, "usage", None)
+        if usage is None:
+            return
+        with self._lock:
+            totals = self._usage.setdefault(operation, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            totals["calls"] += 1
+            totals["prompt_tokens"] += usage.prompt_tokens or 0
+            totals["completion_tokens"] += usage.completion_tokens or 0
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {operation: dict(totals) for operation, totals in self._usage.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._usage.clear()
+
+
+token_usage = TokenUsage()
+
+
+class DuplicateArticleError(RuntimeError):
+    """
+    Raised when an identifier turns out to have been published by another article.
+    """
+
+
+def get_history_store() -> HistoryStore:
+    """
+    Returns the process-wide history store, opening it on first use.
+    The legacy JSON history file is imported into it once.
+    """
+    global _history_store
+    with _reservation_lock:
+        if _history_store is None:
+            _history_store = HistoryStore(HISTORY_DB_PATH, legacy_json_path=HISTORY_FILE_PATH)
+        return _history_store
 
 
 def load_selected_animals() -> list:
     """
-    Loads the list of selected animal identifiers from the history file.
-    Returns an empty list if the file does not exist or if there's a JSON decode error.
+    Loads the list of selected animal identifiers from the history store.
     """
-    if os.path.exists(HISTORY_FILE_PATH):
-        try:
-            with open(HISTORY_FILE_PATH, "r", encoding="utf-8") as file:
-                return json.load(file)
-        except json.JSONDecodeError:
-            logger.error("Error reading JSON from history file.")
-            return []
-    return []
+    return list(get_history_store())
 
 
 def save_selected_animal(animal_identifier: str) -> None:
     """
-    Saves a new animal identifier to the history file.
+    Saves a new animal identifier to the history store.
+    Raises DuplicateArticleError if another article saved it first, so that the caller
+    aborts instead of publishing the combination twice.
     """
-    selected_animals = load_selected_animals()
-    selected_animals.append(animal_identifier)
-    with open(HISTORY_FILE_PATH, "w", encoding="utf-8") as file:
-        json.dump(selected_animals, file, indent=4)
+    # Flagged before the insert, so an article resumed from its pending artifacts
+    # recognises an identifier it saved itself
+    saved_before = artifact_store.mark_selected(animal_identifier)
+    if get_history_store().add(animal_identifier):
+        return
+    if not saved_before:
+        raise DuplicateArticleError(f"Animal identifier '{animal_identifier}' was already published.")
+    logger.info(f"Animal identifier '{animal_identifier}' was saved by an earlier attempt.")
 
 
 def is_animal_selected(animal_identifier: str) -> bool:
     """
     Checks if an animal identifier has already been selected.
     """
-    selected_animals = load_selected_animals()
-    return animal_identifier in selected_animals
+    return animal_identifier in get_history_store()
 
 
-def choose_random_animal() -> str:
+def _claim_pending_identifier() -> Optional[str]:
+    """
+    Reserves the oldest identifier whose artifacts were generated but never published
+    and that no article of this or another process is working on.
     """
-    Chooses a random animal from the animals JSON file.
+    for identifier in artifact_store.pending():
+        with _reservation_lock:
+            if identifier in _reserved_identifiers or not identifier_locks.acquire(identifier):
+                continue
+            _reserved_identifiers.add(identifier)
+            return identifier
+    return None
+
+
+def get_combo_sampler() -> ComboSampler:
+    """
+    Returns the process-wide sampler of unused animal and mood combinations.
+    The sampler is rebuilt when the animal catalog has been reloaded.
+    """
+    global _combo_sampler, _combo_sampler_version
+    history = get_history_store()
+    catalog_version = animal_catalog.refresh()
+    with _reservation_lock:
+        if _combo_sampler is None or _combo_sampler_version != catalog_version:
+            _combo_sampler_version = catalog_version
+            selected = set(history) | _reserved_identifiers
+            _combo_sampler = ComboSampler(list(animal_catalog), MOODS, selected.__contains__)
+            logger.info(
+                f"{_combo_sampler.remaining} of {_combo_sampler.total} animal and mood combinations are unused."
+            )
+        return _combo_sampler
+
+
+def remaining_combinations() -> int:
+    """
+    Returns how many animal and mood combinations have not been used yet.
+    """
+    return get_combo_sampler().remaining
+
+
+def reserve_animal(animal_identifier: str) -> bool:
+    """
+    Reserves an animal identifier so that concurrent workers, in this or another process,
+    do not pick it. Returns False if it is already reserved or was selected before.
+    """
+    selected = is_animal_selected(animal_identifier)
+    with _reservation_lock:
+        if selected or animal_identifier in _reserved_identifiers:
+            return False
+        if not identifier_locks.acquire(animal_identifier):
+            return False
+        _reserved_identifiers.add(animal_identifier)
+        return True
+
+
+def hold_animal(animal_identifier: str) -> bool:
+    """
+    Reserves an identifier that belongs to an unfinished job, even if it was already saved,
+    so that it is neither resumed from cached artifacts nor drawn again.
+    Returns False if another process holds it, e.g. because it is resuming the same job.
+    """
+    with _reservation_lock:
+        if animal_identifier in _reserved_identifiers:
+            return True
+        if not identifier_locks.acquire(animal_identifier):
+            return False
+        _reserved_identifiers.add(animal_identifier)
+        return True
+
+
+def release_animal(animal_identifier: str) -> None:
+    """
+    Drops the reservation of an animal identifier.
+    If the identifier was not saved, its combination becomes available to the sampler again.
+    """
+    with _reservation_lock:
+        _reserved_identifiers.discard(animal_identifier)
+        identifier_locks.release(animal_identifier)
+    if not is_animal_selected(animal_identifier):
+        animal, _, mood = animal_identifier.partition("|")
+        get_combo_sampler().restore(animal, mood)
+
+
+def choose_random_animal(tags: Optional[list] = None, weighted: bool = False) -> str:
+    """
+    Chooses a random animal from the cached animal catalog, optionally filtered by tags.
     Raises an exception if the file is empty or missing.
     """
-    with open(JSON_FILE_PATH, "r", encoding="utf-8") as file:
-        animals = json.load(file)
-    if not animals:
-        raise ValueError("No animals found in the JSON file.")
-    return random.choice(animals)
+    return animal_catalog.choice(tags=tags, weighted=weighted)
 
 
 def choose_random_mood() -> str:
     """
     Returns a random mood from a predefined list.
     """
-    moods = [
-        "šťastný", "smutný", "natěšený", "zvědavý", "ospalý", "nadšený",
-        "rozzlobený", "klidný", "roztržitý", "sebejistý", "nervózní",
-        "vystrašený", "zklamaný", "pyšný", "frustrovaný", "spokojený",
-        "zmatený", "nostalgický", "překvapený", "líný",
-    ]
-    return random.choice(moods)
+    return random.choice(MOODS)
+
+
+def _translate(text: str, source_lang: str, target_lang: str) -> str:
+    """
+    Translates text with an idle pooled translator for the language pair, creating a new
+    one only when all of them are busy.
+    """
+    key = (source_lang, target_lang)
+    with _translators_lock:
+        idle = _translators.get(key)
+        translator = idle.pop() if idle else None
+    if translator is None:
+        translator = GoogleTranslator(source=source_lang, target=target_lang)
+    try:
+        return translator.translate(text)
+    finally:
+        with _translators_lock:
+            _translators.setdefault(key, []).append(translator)
 
 
 def safe_translate(text: str, source_lang: str = "cs", target_lang: str = "en") -> str:
     """
     Safely translates text from source_lang to target_lang.
+    Translations are served from the persistent translation cache when possible.
     If translation fails or returns an empty result, returns the original text.
     """
+    cached = translation_cache.get(source_lang, target_lang, text)
+    if cached is not None:
+        return cached
     try:
-        translator = GoogleTranslator(source=source_lang, target=target_lang)
-        translated = translator.translate(text)
+        translated = _translate(text, source_lang, target_lang)
         if not translated:
             logger.warning(f"Translation returned empty for text: {text}")
             return text
+        translation_cache.put(source_lang, target_lang, text, translated)
         return translated
     except Exception as e:
         logger.error(f"Translation error for text '{text}': {e}")
         return text
 
 
+def safe_translate_batch(texts: List[str], source_lang: str = "cs", target_lang: str = "en") -> List[str]:
+    """
+    Translates several texts, looking each up in the translation cache first.
+    The uncached single-line texts are sent as one newline-joined request; if the response
+    does not split back into the same number of lines, they are translated one by one.
+    """
+    results = {text: translation_cache.get(source_lang, target_lang, text) for text in texts}
+    missing = [text for text, translated in results.items() if translated is None]
+    if len(missing) > 1 and not any("\n" in text for text in missing):
+        try:
+            translated = _translate("\n".join(missing), source_lang, target_lang)
+            lines = [line.strip() for line in (translated or "").split("\n")]
+            if len(lines) == len(missing) and all(lines):
+                batch = dict(zip(missing, lines))
+                translation_cache.put_many(source_lang, target_lang, batch)
+                results.update(batch)
+                missing = []
+            else:
+                logger.warning("Batch translation did not preserve lines, translating one by one.")
+        except Exception as e:
+            logger.error(f"Batch translation error: {e}")
+    for text in missing:
+        results[text] = safe_translate(text, source_lang, target_lang)
+    logger.debug(f"Translation cache: {translation_cache.stats()}")
+    return [results[text] for text in texts]
+
+
 def generate_image(animal_name: str, mood: str, title: str) -> Optional[str]:
     """
     Generates an image using DALL-E 3 with a prompt containing the animal name,
     its mood, and the story title. Returns the absolute path to the saved image.
     """
-    client = AzureOpenAI(
-        api_version=DALLE_API_VERSION, azure_endpoint=AZURE_ENDPOINT, api_key=API_KEY
-    )
-    en_animal_name = safe_translate(animal_name)
-    en_mood = safe_translate(mood)
-    en_title = safe_translate(title)
+    client = get_openai_client(DALLE_API_VERSION)
+    en_animal_name, en_mood, en_title = safe_translate_batch([animal_name, mood, title])
 
     prompt = (
         f"Create an enchanting and detailed illustration in a plush, heartwarming style that clearly reflects a unique Czech fairy tale. "
@@ -115,6 +320,18 @@ def generate_image(animal_name: str, mood: str, title: str) -> Optional[str]:
         f"Ensure that the animal's characteristics, its mood ({en_mood}), and the story's title are all clearly represented in the composition. "
         "The final image must not include any text, letters, numbers, or symbols anywhere in the composition!"
     )
+    image_dir = os.path.join(BASE_DIR, "images")
+    os.makedirs(image_dir, exist_ok=True)
+    unique_filename = f"{uuid.uuid4()}.png"
+    image_path = os.path.join(image_dir, unique_filename)
+
+    image_key = artifact_key("image", prompt, "dalle-e-3")
+    cached_image = artifact_store.get("image", image_key)
+    if cached_image is not None:
+        with open(image_path, "wb") as image_file:
+            image_file.write(cached_image)
+        return image_path
+
     logger.info(
         f"Generating image with animal name: {animal_name} / {en_animal_name}, mood: {mood} / {en_mood}, title: {title} / {en_title}"
     )
@@ -141,11 +358,6 @@ def generate_image(animal_name: str, mood: str, title: str) -> Optional[str]:
         logger.error(f"Error parsing image generation response: {e}")
         return None
 
-    image_dir = os.path.join(BASE_DIR, "images")
-    os.makedirs(image_dir, exist_ok=True)
-    unique_filename = f"{uuid.uuid4()}.png"
-    image_path = os.path.join(image_dir, unique_filename)
-
     try:
         response = requests.get(image_url)
         response.raise_for_status()
@@ -155,19 +367,62 @@ def generate_image(animal_name: str, mood: str, title: str) -> Optional[str]:
 
     with open(image_path, "wb") as image_file:
         image_file.write(response.content)
+    artifact_store.put("image", image_key, response.content, owner=f"{animal_name}|{mood}")
     logger.info(f"Image saved to {image_path}")
     return image_path
 
 
-def generate_post_title_and_story(animal_name: str, mood: str) -> Optional[Tuple[str, str]]:
+TITLE_PATTERN = re.compile(r"<h2>(.*?)</h2>", re.IGNORECASE)
+
+
+def _stream_completion_text(completion_stream, on_title: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Collects the text of a streamed chat completion.
+    Calls on_title as soon as the complete <h2> title has arrived.
+    """
+    parts = []
+    head = None if on_title is None else ""
+    for chunk in completion_stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        parts.append(delta)
+        if head is not None:
+            head += delta
+            title_match = TITLE_PATTERN.search(head) if ">" in delta else None
+            if title_match:
+                head = None
+                on_title(title_match.group(1))
+    return "".join(parts)
+
+
+SELF_EDIT_INSTRUCTIONS = (
+    " Before you answer, draft the story in your head and then edit it as a master editor would: "
+    "make sure it is free of grammar and spelling errors, stylistically polished, logically coherent from beginning to end, "
+    "faithful to the chosen animal and mood, entertaining, and that it flows smoothly. "
+    "Output only the final, edited version."
+)
+
+
+def generate_post_title_and_story(
+    animal_name: str,
+    mood: str,
+    stream: bool = False,
+    on_title: Optional[Callable[[str], None]] = None,
+    self_edit: bool = False,
+) -> Optional[Tuple[str, str]]:
     """
     Generates a post title and story using a chat completion API.
     The story is expected to be in HTML format with an <h2> title and paragraphs.
+    With stream=True the completion is consumed incrementally and on_title is called
+    as soon as the title is known, before the rest of the story has been written.
+    With self_edit=True the writer is asked to edit its draft before answering, which
+    replaces the separate validation request (the "single_pass" validation mode).
     Returns a tuple of (title, story) if successful.
     """
-    client = AzureOpenAI(
-        api_version=API_VERSION, azure_endpoint=AZURE_ENDPOINT, api_key=API_KEY
-    )
+    client = get_openai_client(API_VERSION)
     messages = [
         {
             "role": "system",
@@ -177,6 +432,7 @@ def generate_post_title_and_story(animal_name: str, mood: str) -> Optional[Tuple
                 "Your style is comprehensible, melodic, and straightforward – every word carries joy and adventure. "
                 "Your task: based on the name of the animal, create an original Czech fairy tale with a clear structure including an introduction, conflict, adventure, climax, and a simple moral. "
                 "Ensure that the plot is engaging and the language accessible even for the youngest."
+                + (SELF_EDIT_INSTRUCTIONS if self_edit else "")
             ),
         },
         {
@@ -194,21 +450,30 @@ def generate_post_title_and_story(animal_name: str, mood: str) -> Optional[Tuple
         },
     ]
 
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4", messages=messages, temperature=0.7, max_tokens=4000
-        )
-    except Exception as e:
-        logger.error(f"Error generating story: {e}")
-        return None
-
-    if completion and completion.choices:
-        answer_text = completion.choices[0].message.content
+    story_key = artifact_key("story", animal_name, mood, json.dumps(messages), "gpt-4")
+    answer_text = artifact_store.get_text("story", story_key)
+    if answer_text is None:
+        try:
+            completion = client.chat.completions.create(
+                model="gpt-4", messages=messages, temperature=0.7, max_tokens=4000, stream=stream
+            )
+            if stream:
+                answer_text = _stream_completion_text(completion, on_title)
+            elif completion and completion.choices:
+                token_usage.add("story", completion)
+                answer_text = completion.choices[0].message.content
+        except Exception as e:
+            logger.error(f"Error generating story: {e}")
+            return None
+        if answer_text:
+            artifact_store.put_text("story", story_key, answer_text, owner=f"{animal_name}|{mood}")
+
+    if answer_text:
         # Remove code block markers if present
         answer_text = "\n".join(
             line for line in answer_text.splitlines() if line.strip() not in ("```", "```html")
         )
-        title_match = re.search(r"<h2>(.*?)</h2>", answer_text, re.IGNORECASE)
+        title_match = TITLE_PATTERN.search(answer_text)
         title = title_match.group(1) if title_match else "Untitled"
         return title, answer_text
     else:
@@ -216,46 +481,108 @@ def generate_post_title_and_story(animal_name: str, mood: str) -> Optional[Tuple
         return None
 
 
-def generate_unique_animal_content(max_attempts: int = 10) -> Tuple[str, str, str]:
+def generate_unique_story(
+    max_attempts: int = 10,
+    stream: bool = False,
+    on_title: Optional[Callable[[str, str, str], None]] = None,
+    self_edit: bool = False,
+) -> Tuple[str, str, str, str, str]:
+    """
+    Picks an animal and mood combination that has not been used yet and generates a story for it.
+    Combinations are drawn from the unused pool, so only failed generations count as attempts.
+    The combination stays reserved until it is released with release_animal().
+    The leading <h2> title is removed from the story to avoid duplication.
+    on_title(animal, mood, title) is called exactly once, as early as the title is known;
+    when streaming, a failure after that point is raised instead of retried with another animal.
+    Returns a tuple of (animal, mood, identifier, title, story).
+    """
+    sampler = get_combo_sampler()
+    announced = []
     attempts = 0
     while attempts < max_attempts:
-        animal = choose_random_animal()
-        mood = choose_random_mood()
-        identifier = f"{animal}|{mood}"
-        if not is_animal_selected(identifier):
-            result = generate_post_title_and_story(animal, mood)
-            if not result:
-                logger.error("Story generation failed, trying another animal...")
-                attempts += 1
-                continue
-            title, story = result
-            # Remove the first <h2> title from the story to avoid duplication
-            story = re.sub(r"<h2>.*?</h2>\s*", "", story, count=1, flags=re.IGNORECASE | re.DOTALL)
-            
-            # NEW STEP: Validate and correct the story using the LLM quality control
-            story = validate_and_correct_output(story)
-            
-            image_path = generate_image(animal, mood, title)
-            if not image_path:
-                logger.error("Image generation failed, trying another animal...")
-                attempts += 1
-                continue
-            save_selected_animal(identifier)
-            return title, story, image_path
+        identifier = _claim_pending_identifier()
+        if identifier:
+            animal, _, mood = identifier.partition("|")
+            sampler.discard(animal, mood)
+            logger.info(f"Resuming unpublished '{identifier}' from cached artifacts.")
         else:
-            logger.warning(f"Animal '{animal}' with mood '{mood}' has already been selected. Trying another...")
+            combo = sampler.draw()
+            if combo is None:
+                raise Exception("All animal and mood combinations have already been used.")
+            animal, mood = combo
+            identifier = f"{animal}|{mood}"
+            if not reserve_animal(identifier):
+                # Published or being generated by another process
+                logger.warning(f"Animal '{animal}' with mood '{mood}' is already taken. Trying another...")
+                continue
+            artifact_store.mark_pending(identifier)
+            logger.info(f"Selected '{identifier}', {sampler.remaining} unused combinations left.")
+
+        def announce(title: str, animal: str = animal, mood: str = mood) -> None:
+            announced.append(title)
+            if on_title:
+                on_title(animal, mood, title)
+
+        result = generate_post_title_and_story(
+            animal, mood, stream=stream, on_title=announce if stream else None, self_edit=self_edit
+        )
+        if not result:
+            artifact_store.clear_pending(identifier)
+            release_animal(identifier)
+            if announced:
+                raise Exception("Story generation failed after its title was announced.")
+            logger.error("Story generation failed, trying another animal...")
             attempts += 1
+            continue
+        title, story = result
+        if not announced:
+            announce(title)
+        # Remove the first <h2> title from the story to avoid duplication
+        story = re.sub(r"<h2>.*?</h2>\s*", "", story, count=1, flags=re.IGNORECASE | re.DOTALL)
+        return animal, mood, identifier, title, story
 
     raise Exception("Failed to generate unique content after several attempts.")
 
 
-def validate_and_correct_output(text: str) -> str:
+def generate_unique_animal_content(max_attempts: int = 10) -> Tuple[str, str, str]:
+    attempts = 0
+    while attempts < max_attempts:
+        animal, mood, identifier, title, story = generate_unique_story(max_attempts - attempts)
+
+        # Validate and correct the story using the LLM quality control
+        story = validate_and_correct_output(story, owner=identifier)
+
+        image_path = generate_image(animal, mood, title)
+        if not image_path:
+            release_animal(identifier)
+            logger.error("Image generation failed, trying another animal...")
+            attempts += 1
+            continue
+        save_selected_animal(identifier)
+        release_animal(identifier)
+        return title, story, image_path
+
+    raise Exception("Failed to generate unique content after several attempts.")
+
+
+def validate_and_correct_output(text: str, owner: Optional[str] = None, mode: str = "full") -> str:
     """
     Uses an LLM to validate and correct the given text for quality, clarity, grammar,
     narrative coherence, adherence to the concept, entertainment value, and smooth flow.
+    In "diff" mode only the corrections are requested and applied locally, see
+    validate_with_corrections(); "single_pass" stories were already edited and are
+    returned unchanged.
+    Corrections are cached as artifacts of `owner` (the animal identifier), if given.
     If the correction fails, the original text is returned.
     """
-    client = AzureOpenAI(api_version=API_VERSION, azure_endpoint=AZURE_ENDPOINT, api_key=API_KEY)
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unknown validation mode: {mode}")
+    if mode == "single_pass":
+        return text
+    if mode == "diff":
+        return validate_with_corrections(text, owner=owner)
+
+    client = get_openai_client(API_VERSION)
     messages = [
         {
             "role": "system",
@@ -275,13 +602,22 @@ def validate_and_correct_output(text: str) -> str:
         },
     ]
     
+    validated_key = artifact_key("validated_story", json.dumps(messages), "gpt-4")
+    cached = artifact_store.get_text("validated_story", validated_key)
+    if cached is not None:
+        return cached
+
     try:
         completion = client.chat.completions.create(
             model="gpt-4", messages=messages, temperature=0.3, max_tokens=4000
         )
+        token_usage.add("validate", completion)
         if completion and completion.choices:
             corrected_text = completion.choices[0].message.content.strip()
-            return corrected_text if corrected_text else text
+            if not corrected_text:
+                return text
+            artifact_store.put_text("validated_story", validated_key, corrected_text, owner=owner)
+            return corrected_text
         else:
             logger.warning("No correction received; returning original text.")
             return text
@@ -290,6 +626,88 @@ def validate_and_correct_output(text: str) -> str:
         return text
 
 
+def _parse_corrections(answer_text: str) -> List[Dict[str, str]]:
+    # Tolerate a ```json code block around the answer
+    answer_text = answer_text.strip()
+    if answer_text.startswith("```"):
+        answer_text = answer_text.strip("`")
+        answer_text = answer_text[answer_text.find("\n") + 1:] if "\n" in answer_text else ""
+    data = json.loads(answer_text)
+    corrections = data.get("corrections", []) if isinstance(data, dict) else data
+    return [
+        correction for correction in corrections
+        if isinstance(correction, dict) and isinstance(correction.get("find"), str)
+        and isinstance(correction.get("replace"), str) and correction["find"]
+    ]
+
+
+def apply_corrections(text: str, corrections: List[Dict[str, str]]) -> str:
+    """
+    Applies find/replace corrections in order, each to its first occurrence.
+    Corrections whose text is not found are skipped.
+    """
+    for correction in corrections:
+        if correction["find"] not in text:
+            logger.warning(f"Correction not applied, text not found: {correction['find'][:60]!r}")
+            continue
+        text = text.replace(correction["find"], correction["replace"], 1)
+    return text
+
+
+def validate_with_corrections(text: str, owner: Optional[str] = None) -> str:
+    """
+    Diff-only validation: the editor reviews the story like validate_and_correct_output,
+    but answers with a JSON list of exact find/replace corrections instead of the whole
+    story, so the response is a fraction of the story length.
+    If the correction fails, the original text is returned.
+    """
+    client = get_openai_client(API_VERSION)
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "You are a master editor and storyteller with a keen eye for detail and narrative integrity. "
+                "Your task is to review the provided text and ensure it is error-free, stylistically polished, and logically coherent from beginning to end. "
+                "Make sure the text strictly adheres to the intended concept, is engaging and entertaining, and flows smoothly. "
+                "Do not return the text. Return only a JSON object of the form "
+                '{"corrections": [{"find": "...", "replace": "..."}]}, where "find" is an exact, unique excerpt '
+                "of the original text (including HTML tags) and \"replace\" its corrected Czech version. "
+                'Keep each excerpt as short as possible. If nothing needs to change, return {"corrections": []}.'
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Please review the following story and list corrections for any issues related to grammar, style, "
+                f"narrative coherence, concept adherence, entertainment value, and smooth flow:\n\n{text}"
+            ),
+        },
+    ]
+
+    validated_key = artifact_key("validated_story", json.dumps(messages), "gpt-4")
+    cached = artifact_store.get_text("validated_story", validated_key)
+    if cached is not None:
+        return cached
+
+    try:
+        completion = client.chat.completions.create(
+            model="gpt-4", messages=messages, temperature=0.3, max_tokens=2000
+        )
+        token_usage.add("validate", completion)
+        if not (completion and completion.choices and completion.choices[0].message.content):
+            logger.warning("No correction received; returning original text.")
+            return text
+        corrections = _parse_corrections(completion.choices[0].message.content)
+    except Exception as e:
+        logger.error(f"Error during output validation: {e}")
+        return text
+
+    logger.info(f"Applying {len(corrections)} corrections to the story.")
+    corrected_text = apply_corrections(text, corrections)
+    artifact_store.put_text("validated_story", validated_key, corrected_text, owner=owner)
+    return corrected_text
+
+
 
 
 def main() -> None:
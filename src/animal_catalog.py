@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import random
+import bisect
+import threading
+from array import array
+from typing import Dict, Iterable, Iterator, Optional
+from logger import logger
+
+
+class AnimalCatalog:
+    """
+    In-memory catalog of the animals listed in animals.json.
+
+    The file is parsed lazily on first use and reloaded only when its modification time
+    changes (checked at most every `check_interval` seconds). Names are stored in a single
+    string with an array of offsets, which keeps the catalog compact and gives O(1) access
+    by index. Entries may be plain names or objects with "name", optional "tags" and "weight".
+    """
+
+    def __init__(self, path: str, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._names = ""
+        self._offsets = array("I", [0])
+        self._tags: Dict[str, array] = {}
+        self._cumulative_weights: Optional[array] = None
+
+    def _ensure_loaded(self) -> None:
+        now = time.monotonic()
+        if self._mtime is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            mtime = os.stat(self.path).st_mtime
+            if mtime != self._mtime:
+                self._load()
+                self._mtime = mtime
+
+    def _load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as file:
+            entries = json.load(file)
+        if not entries:
+            raise ValueError("No animals found in the JSON file.")
+
+        names = []
+        offsets = array("I", [0])
+        tags: Dict[str, array] = {}
+        weights = array("d")
+        weighted = False
+        for index, entry in enumerate(entries):
+            if isinstance(entry, dict):
+                name = entry["name"]
+                for tag in entry.get("tags", ()):
+                    tags.setdefault(tag, array("I")).append(index)
+                weight = float(entry.get("weight", 1.0))
+                weighted = weighted or "weight" in entry
+            else:
+                name, weight = entry, 1.0
+            names.append(name)
+            offsets.append(offsets[-1] + len(name))
+            weights.append(weights[-1] + weight if weights else weight)
+
+        self._names = "".join(names)
+        self._offsets = offsets
+        self._tags = tags
+        self._cumulative_weights = weights if weighted else None
+        self.version += 1
+        logger.info(f"Loaded {len(names)} animals from {self.path}")
+
+    def refresh(self) -> int:
+        """
+        Reloads the file if it changed and returns the catalog version.
+        """
+        self._ensure_loaded()
+        return self.version
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        self._ensure_loaded()
+        offsets = self._offsets
+        if index < 0:
+            index += len(offsets) - 1
+        return self._names[offsets[index]:offsets[index + 1]]
+
+    def __iter__(self) -> Iterator[str]:
+        self._ensure_loaded()
+        names, offsets = self._names, self._offsets
+        return (names[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1))
+
+    def indices(self, tags: Iterable[str]) -> list:
+        """
+        Returns the indices of animals that carry all of the given tags.
+        """
+        self._ensure_loaded()
+        selected = None
+        for tag in tags:
+            tagged = set(self._tags.get(tag, ()))
+            selected = tagged if selected is None else selected & tagged
+        return sorted(selected or ())
+
+    def choice(self, tags: Optional[Iterable[str]] = None, weighted: bool = False, rng: random.Random = None) -> str:
+        """
+        Returns a random animal name, optionally limited to animals with all `tags`
+        and drawn proportionally to the entry weights.
+        """
+        self._ensure_loaded()
+        rng = rng or random
+        weights = self._cumulative_weights if weighted else None
+        if tags:
+            candidates = self.indices(tags)
+            if not candidates:
+                raise ValueError(f"No animals found with tags: {', '.join(tags)}")
+            if weights is None:
+                return self[rng.choice(candidates)]
+            candidate_weights = [weights[i] - (weights[i - 1] if i else 0.0) for i in candidates]
+            return self[rng.choices(candidates, weights=candidate_weights)[0]]
+        if weights is None:
+            return self[rng.randrange(len(self._offsets) - 1)]
+        index = bisect.bisect_right(weights, rng.random() * weights[-1])
+        return self[min(index, len(weights) - 1)]
@@ -0,0 +1,106 @@
+import os
+import json
+import shutil
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from logger import logger
+
+METADATA_FILE = "article.json"
+
+
+@dataclass
+class QueuedArticle:
+    name: str
+    path: str
+    values: Dict[str, Any]
+
+
+class ArticleQueue:
+    """
+    On-disk FIFO of fully generated articles waiting to be published.
+
+    Every article is a directory holding its files (image, audio, video) and an
+    article.json with the pipeline values. It is assembled under tmp/ and renamed into
+    ready/ in one step, and a consumer claims it by renaming it into claimed/, so
+    producers and consumers in separate processes never see half-written articles or
+    publish the same one twice.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        for directory in ("tmp", "ready", "claimed"):
+            os.makedirs(os.path.join(root, directory), exist_ok=True)
+
+    def _dir(self, state: str, name: str = "") -> str:
+        return os.path.join(self.root, state, name)
+
+    def put(self, values: Dict[str, Any], files: Dict[str, str]) -> str:
+        """
+        Enqueues an article. `files` maps value names to local files, which are moved
+        into the queue; the other values are stored as they are. Returns the item name.
+        """
+        # Timestamp first, so that the directory listing is in enqueue order
+        name = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+        tmp_path = self._dir("tmp", name)
+        os.makedirs(tmp_path)
+        stored = dict(values)
+        try:
+            for value_name, file_path in files.items():
+                if not file_path:
+                    stored[value_name] = None
+                    continue
+                filename = f"{value_name}{os.path.splitext(file_path)[1]}"
+                shutil.move(file_path, os.path.join(tmp_path, filename))
+                stored[value_name] = filename
+            with open(os.path.join(tmp_path, METADATA_FILE), "w", encoding="utf-8") as file:
+                json.dump({"files": list(files), "values": stored}, file, ensure_ascii=False, indent=4)
+            os.rename(tmp_path, self._dir("ready", name))
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        logger.info(f"Article '{values.get('title')}' queued as {name}")
+        return name
+
+    def _load(self, state: str, name: str) -> QueuedArticle:
+        path = self._dir(state, name)
+        with open(os.path.join(path, METADATA_FILE), "r", encoding="utf-8") as file:
+            data = json.load(file)
+        values = data["values"]
+        for value_name in data["files"]:
+            if values.get(value_name):
+                values[value_name] = os.path.join(path, values[value_name])
+        return QueuedArticle(name, path, values)
+
+    def ready(self) -> List[str]:
+        return sorted(os.listdir(self._dir("ready")))
+
+    def __len__(self) -> int:
+        return len(self.ready())
+
+    def claim(self) -> Optional[QueuedArticle]:
+        """
+        Takes the oldest ready article, or returns None if the queue is empty.
+        """
+        for name in self.ready():
+            try:
+                os.rename(self._dir("ready", name), self._dir("claimed", name))
+            except FileNotFoundError:
+                # Claimed by another consumer in the meantime
+                continue
+            return self._load("claimed", name)
+        return None
+
+    def release(self, article: QueuedArticle) -> None:
+        """
+        Puts a claimed article back at its original position in the queue.
+        """
+        os.rename(article.path, self._dir("ready", article.name))
+        logger.info(f"Article {article.name} returned to the queue")
+
+    def complete(self, name: str) -> None:
+        """
+        Removes a published (claimed) article together with its remaining files.
+        """
+        shutil.rmtree(self._dir("claimed", name), ignore_errors=True)
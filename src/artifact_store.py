@@ -0,0 +1,168 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional
+from logger import logger
+
+
+def artifact_key(*parts: str) -> str:
+    """
+    Builds a content address from the inputs that determine an artifact
+    (e.g. the animal|mood identifier, the prompt and the model name).
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    On-disk store of generated artifacts (stories, images, audio) addressed by artifact_key().
+
+    Artifacts are grouped per article identifier in a "pending" record until the article is
+    published, so an interrupted run can pick the same identifier up again and reuse
+    everything that was already generated instead of paying for it twice.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "pending"), exist_ok=True)
+
+    def path(self, kind: str, key: str) -> str:
+        return os.path.join(self.root, kind, key[:2], key)
+
+    def _pending_path(self, identifier: str) -> str:
+        return os.path.join(self.root, "pending", artifact_key(identifier) + ".json")
+
+    def get(self, kind: str, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(kind, key), "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        logger.info(f"Reusing cached {kind} artifact {key[:12]}")
+        return data
+
+    def put(self, kind: str, key: str, data: bytes, owner: Optional[str] = None) -> str:
+        """
+        Stores an artifact atomically and returns its path. If `owner` is given, the
+        artifact is recorded in that identifier's pending record.
+        """
+        path = self.path(kind, key)
+        tmp_path = self._tmp_path(path)
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        return self._commit(kind, key, tmp_path, owner)
+
+    def put_file(self, kind: str, key: str, source_path: str, owner: Optional[str] = None) -> str:
+        """
+        Stores a copy of an existing file as an artifact without loading it into memory.
+        """
+        tmp_path = self._tmp_path(self.path(kind, key))
+        shutil.copyfile(source_path, tmp_path)
+        return self._commit(kind, key, tmp_path, owner)
+
+    def export(self, kind: str, key: str, destination_path: str) -> bool:
+        """
+        Copies a cached artifact to destination_path. Returns False if it is not cached.
+        """
+        try:
+            shutil.copyfile(self.path(kind, key), destination_path)
+        except FileNotFoundError:
+            return False
+        logger.info(f"Reusing cached {kind} artifact {key[:12]}")
+        return True
+
+    @staticmethod
+    def _tmp_path(path: str) -> str:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def _commit(self, kind: str, key: str, tmp_path: str, owner: Optional[str]) -> str:
+        path = self.path(kind, key)
+        os.replace(tmp_path, path)
+        if owner:
+            self._update_pending(owner, lambda record: record["artifacts"].append([kind, key]))
+        return path
+
+    def get_text(self, kind: str, key: str) -> Optional[str]:
+        data = self.get(kind, key)
+        return data.decode("utf-8") if data is not None else None
+
+    def put_text(self, kind: str, key: str, text: str, owner: Optional[str] = None) -> str:
+        return self.put(kind, key, text.encode("utf-8"), owner=owner)
+
+    def _update_pending(self, identifier: str, update: Callable[[Dict], None]) -> None:
+        path = self._pending_path(identifier)
+        with self._lock:
+            record = self._read_pending(path) or {"identifier": identifier, "artifacts": []}
+            update(record)
+            with open(path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(record, file, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _read_pending(path: str) -> Optional[Dict]:
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def mark_pending(self, identifier: str) -> None:
+        """
+        Records that content for the identifier is being generated but not yet published.
+        """
+        self._update_pending(identifier, lambda record: None)
+
+    def mark_selected(self, identifier: str) -> bool:
+        """
+        Flags the identifier's pending record as saved to the history. Returns True if it
+        already was, i.e. an earlier attempt at the same article got that far.
+        """
+        flagged = []
+
+        def update(record: Dict) -> None:
+            flagged.append(record.get("selected", False))
+            record["selected"] = True
+
+        self._update_pending(identifier, update)
+        return flagged[0]
+
+    def pending(self) -> List[str]:
+        """
+        Returns identifiers with generated artifacts that have not been published, oldest first.
+        """
+        directory = os.path.join(self.root, "pending")
+        entries = []
+        for entry in os.scandir(directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                continue
+        records = [self._read_pending(path) for _, path in sorted(entries)]
+        return [record["identifier"] for record in records if record]
+
+    def clear_pending(self, identifier: str, delete_artifacts: bool = True) -> None:
+        """
+        Forgets the identifier's pending record, by default deleting its artifacts as well.
+        """
+        path = self._pending_path(identifier)
+        with self._lock:
+            record = self._read_pending(path)
+            if record is None:
+                return
+            if delete_artifacts:
+                for kind, key in record["artifacts"]:
+                    try:
+                        os.remove(self.path(kind, key))
+                    except FileNotFoundError:
+                        pass
+            os.remove(path)
@@ -0,0 +1,197 @@
+"""
+End-to-end benchmark of the article pipeline against the offline provider stand-ins.
+
+Usage:
+    python src/benchmark_pipeline.py --articles 8 --concurrency 4 --time-scale 0.05
+    python src/benchmark_pipeline.py --latency dalle=30 --failure-rate 0.05 --stream-audio
+    python src/benchmark_pipeline.py --only audio,upload_audio --articles 5
+
+Runs main.post_ai_article (or, with --only, just the named stages on synthetic inputs)
+with every provider replaced by the stand-ins from offline_providers.py, and reports
+per-stage wall time, throughput in articles per minute and peak RSS. All state
+(history, artifacts, caches, jobs, media files) lives in a temporary directory.
+"""
+import os
+import time
+import shutil
+import argparse
+import resource
+import statistics
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Dict, List
+
+import ai_content_generator
+import elevenlabs_client
+import main
+from article_queue import ArticleQueue
+from artifact_store import ArtifactStore
+from elevenlabs_client import AudioCache
+from identifier_locks import IdentifierLocks
+from job_store import JobStore
+from offline_providers import DEFAULT_PROFILES, offline_providers, sample_story
+from pipeline import provider_limits, run_pipeline
+from translation_cache import TranslationCache
+
+
+def _isolate_state(workdir: str) -> None:
+    """Points every store and output directory of the pipeline into workdir."""
+    ai_content_generator.BASE_DIR = workdir
+    ai_content_generator.HISTORY_DB_PATH = os.path.join(workdir, "selected_animals.sqlite3")
+    ai_content_generator.HISTORY_FILE_PATH = os.path.join(workdir, "selected_animals.json")
+    ai_content_generator._history_store = None
+    ai_content_generator._combo_sampler = None
+    ai_content_generator.artifact_store = main.artifact_store = ArtifactStore(os.path.join(workdir, "artifacts"))
+    ai_content_generator.identifier_locks = IdentifierLocks(os.path.join(workdir, "reservations"))
+    ai_content_generator.translation_cache = TranslationCache(os.path.join(workdir, "translation_cache.json"))
+    elevenlabs_client.AUDIO_DIR = os.path.join(workdir, "audio_files")
+    elevenlabs_client.audio_cache = AudioCache(os.path.join(workdir, "audio_cache"))
+    main.job_store = JobStore(os.path.join(workdir, "jobs"))
+    main.article_queue = ArticleQueue(os.path.join(workdir, "queue"))
+    # Videos are written relative to the working directory
+    os.chdir(workdir)
+
+
+def _synthetic_values(workdir: str, index: int) -> Dict:
+    """Inputs for running single stages without the stages that normally produce them."""
+    files = {
+        "image_path": (f"synthetic-{index}.png", DEFAULT_PROFILES["dalle"].payload_bytes),
+        "audio_path": (f"synthetic-{index}.mp3", DEFAULT_PROFILES["elevenlabs"].payload_bytes * 4),
+        "video_path": (f"synthetic-{index}.mp4", DEFAULT_PROFILES["ffmpeg"].payload_bytes * 240),
+    }
+    paths = {}
+    for name, (filename, size) in files.items():
+        paths[name] = os.path.join(workdir, filename)
+        with open(paths[name], "wb") as file:
+            file.write(os.urandom(size))
+    story = sample_story(DEFAULT_PROFILES["azure_openai"].payload_bytes, index + 1)
+    return {
+        **paths,
+        "identifier": f"Benchmark {index}|veselá",
+        "animal": f"Benchmark {index}",
+        "mood": "veselá",
+        "title": f"Offline pohádka {index + 1}",
+        "draft_story": story,
+        "story": story,
+        "image_attachment_id": index + 1,
+        "image_url": None,
+        "audio_html": "",
+        "post": {"id": index + 1, "link": None},
+    }
+
+
+def _parse_assignment(value: str) -> tuple:
+    provider, _, number = value.partition("=")
+    if provider not in DEFAULT_PROFILES:
+        raise argparse.ArgumentTypeError(f"Unknown provider {provider}, expected one of: {', '.join(DEFAULT_PROFILES)}")
+    try:
+        return provider, float(number)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected PROVIDER=NUMBER, got {value}")
+
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def _print_stage_table(timings: List[Dict[str, float]]) -> None:
+    per_stage: Dict[str, List[float]] = {}
+    for run in timings:
+        for stage, duration in run.items():
+            per_stage.setdefault(stage, []).append(duration)
+    print(f"{'stage':<16}{'runs':>6}{'mean s':>10}{'median s':>10}{'max s':>10}")
+    for stage, durations in sorted(per_stage.items(), key=lambda item: -statistics.mean(item[1])):
+        print(f"{stage:<16}{len(durations):>6}{statistics.mean(durations):>10.2f}"
+              f"{statistics.median(durations):>10.2f}{max(durations):>10.2f}")
+
+
+def main_benchmark() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the article pipeline with offline providers.")
+    parser.add_argument("--articles", type=int, default=4, help="articles to publish")
+    parser.add_argument("--concurrency", type=int, default=2, help="articles processed in parallel")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="multiplier for all provider latencies")
+    parser.add_argument("--latency", type=_parse_assignment, action="append", default=[], metavar="PROVIDER=S",
+                        help="base latency of a provider in seconds (may be repeated)")
+    parser.add_argument("--payload", type=_parse_assignment, action="append", default=[], metavar="PROVIDER=BYTES",
+                        help="payload size of a provider (may be repeated)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="failure probability of every provider call")
+    parser.add_argument("--limit", type=main._parse_limit, action="append", default=[], metavar="PROVIDER=N",
+                        help="maximum concurrent calls to a provider (may be repeated)")
+    parser.add_argument("--only", help="comma separated stages to run alone on synthetic inputs")
+    parser.add_argument("--stream-audio", action="store_true")
+    parser.add_argument("--validation", choices=ai_content_generator.VALIDATION_MODES, default="full")
+    parser.add_argument("--real-ffmpeg", action="store_true", help="encode videos with ffmpeg instead of a stand-in")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    profiles = {name: replace(profile, failure_rate=args.failure_rate) for name, profile in DEFAULT_PROFILES.items()}
+    for provider, latency in args.latency:
+        profiles[provider] = replace(profiles[provider], latency=latency)
+    for provider, payload in args.payload:
+        profiles[provider] = replace(profiles[provider], payload_bytes=int(payload))
+
+    timings: List[Dict[str, float]] = []
+
+    def timed_run_pipeline(*pipeline_args, **pipeline_kwargs):
+        result = run_pipeline(*pipeline_args, **pipeline_kwargs)
+        timings.append(result.timings)
+        return result
+
+    workdir = tempfile.mkdtemp(prefix="pipeline-benchmark-")
+    cwd = os.getcwd()
+    main.run_pipeline = timed_run_pipeline
+    try:
+        _isolate_state(workdir)
+        with offline_providers(profiles, args.time_scale, args.seed, args.real_ffmpeg) as (wordpress, stand_ins):
+            semaphores = provider_limits({**main.PROVIDER_LIMITS, **dict(args.limit)})
+            stages = main.build_article_stages(stream_audio=args.stream_audio, validation=args.validation,
+                                               limits=semaphores)
+            if args.only:
+                names = args.only.split(",")
+                unknown = set(names) - {stage.name for stage in stages}
+                if unknown:
+                    parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+                stages = [stage for stage in stages if stage.name in names]
+
+                def task(index: int) -> bool:
+                    produced = {name for stage in stages for name in stage.outputs + stage.emits}
+                    initial = {name: value for name, value in _synthetic_values(workdir, index).items()
+                               if name not in produced}
+                    timed_run_pipeline(stages, initial={**initial, "wordpress": wordpress}, limits=semaphores)
+                    return True
+            else:
+                def task(index: int) -> bool:
+                    return main.post_ai_article(wordpress, semaphores, stream_audio=args.stream_audio,
+                                                validation=args.validation)
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+                futures = [pool.submit(task, index) for index in range(args.articles)]
+                completed = 0
+                for future in futures:
+                    try:
+                        completed += bool(future.result())
+                    except Exception as e:
+                        print(f"Run failed: {e}")
+            wall_time = time.perf_counter() - start
+            main.render_pool.shutdown()
+    finally:
+        main.run_pipeline = run_pipeline
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    _print_stage_table(timings)
+    print()
+    print(f"completed: {completed}/{args.articles} in {wall_time:.2f} s "
+          f"(time scale {args.time_scale}), {completed / wall_time * 60:.1f} per minute")
+    print(f"peak RSS: {_peak_rss_mb(resource.RUSAGE_SELF):.1f} MB, "
+          f"children: {_peak_rss_mb(resource.RUSAGE_CHILDREN):.1f} MB")
+    print(f"provider calls: {', '.join(f'{name} {s.calls} ({s.failures} failed)' for name, s in stand_ins.items())}")
+    print(f"WordPress request timings: {wordpress.metrics.summary()}")
+
+
+if __name__ == "__main__":
+    main_benchmark()
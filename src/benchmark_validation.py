@@ -0,0 +1,83 @@
+"""
+Compares the story validation modes end to end against Azure OpenAI.
+
+For every sample a random animal and mood are drawn and each mode produces a final story:
+    full         generate_post_title_and_story + validate_and_correct_output (today's flow)
+    diff         generate_post_title_and_story + corrections-only validation
+    single_pass  generate_post_title_and_story with self-editing, no validation request
+
+Usage:
+    python src/benchmark_validation.py --samples 3
+
+Nothing is reserved or published, and every mode runs against an empty temporary
+artifact store so cached stories and corrections do not skew the timings.
+"""
+import time
+import random
+import argparse
+import tempfile
+
+import ai_content_generator
+from ai_content_generator import (
+    MOODS,
+    VALIDATION_MODES,
+    animal_catalog,
+    generate_post_title_and_story,
+    token_usage,
+    validate_and_correct_output,
+)
+from artifact_store import ArtifactStore
+from client_registry import close_clients
+
+
+def run_mode(mode: str, animal: str, mood: str) -> dict:
+    token_usage.reset()
+    with tempfile.TemporaryDirectory() as directory:
+        ai_content_generator.artifact_store = ArtifactStore(directory)
+        start = time.perf_counter()
+        result = generate_post_title_and_story(animal, mood, self_edit=mode == "single_pass")
+        generated = time.perf_counter()
+        if result is None:
+            raise RuntimeError(f"Story generation failed for {animal} ({mood}).")
+        story = validate_and_correct_output(result[1], mode=mode)
+        finished = time.perf_counter()
+    usage = token_usage.snapshot()
+    return {
+        "generate_s": generated - start,
+        "validate_s": finished - generated,
+        "total_s": finished - start,
+        "prompt_tokens": sum(totals["prompt_tokens"] for totals in usage.values()),
+        "completion_tokens": sum(totals["completion_tokens"] for totals in usage.values()),
+        "story_chars": len(story),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark story validation modes.")
+    parser.add_argument("--samples", type=int, default=3, help="stories generated per mode")
+    parser.add_argument("--modes", nargs="+", choices=VALIDATION_MODES, default=list(VALIDATION_MODES))
+    parser.add_argument("--seed", type=int, default=None, help="seed for the animal and mood choice")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    samples = [(animal_catalog.choice(rng=rng), rng.choice(MOODS)) for _ in range(args.samples)]
+    original_store = ai_content_generator.artifact_store
+    results = {mode: [] for mode in args.modes}
+    try:
+        for animal, mood in samples:
+            for mode in args.modes:
+                results[mode].append(run_mode(mode, animal, mood))
+                print(f"{animal} ({mood}) {mode}: {results[mode][-1]['total_s']:.1f} s")
+    finally:
+        ai_content_generator.artifact_store = original_store
+        close_clients()
+
+    columns = ("generate_s", "validate_s", "total_s", "prompt_tokens", "completion_tokens", "story_chars")
+    print(f"\n{'mode':<13}" + "".join(f"{column:>19}" for column in columns))
+    for mode, runs in results.items():
+        means = [sum(run[column] for run in runs) / len(runs) for column in columns]
+        print(f"{mode:<13}" + "".join(f"{mean:>19.1f}" for mean in means))
+
+
+if __name__ == "__main__":
+    main()
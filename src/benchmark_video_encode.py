@@ -0,0 +1,83 @@
+"""
+Compares ffmpeg encode profiles for the still-image YouTube video.
+
+Usage:
+    python src/benchmark_video_encode.py --image story.png --audio story.mp3
+    python src/benchmark_video_encode.py --duration 300 --runs 3
+
+Without --image/--audio a test image (1792x1024, the DALL-E output size) and a sine
+tone MP3 of --duration seconds are generated with ffmpeg.
+"""
+import os
+import time
+import argparse
+import tempfile
+import subprocess
+
+from youtube_uploader import VIDEO_PRESET, create_video_from_image_and_audio
+
+# (label, keyword arguments for create_video_from_image_and_audio)
+PROFILES = [
+    ("legacy", {"profile": "legacy"}),
+    ("still, aac", {"profile": "still", "audio_codec": "aac"}),
+    ("still, copy", {"profile": "still", "audio_codec": "copy"}),
+    ("still, copy, ultrafast", {"profile": "still", "audio_codec": "copy", "preset": "ultrafast"}),
+]
+
+
+def _make_inputs(directory: str, duration: int) -> tuple:
+    image_path = os.path.join(directory, "image.png")
+    audio_path = os.path.join(directory, "audio.mp3")
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=size=1792x1024",
+         "-frames:v", "1", image_path],
+        check=True,
+    )
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+         "-c:a", "libmp3lame", "-b:a", "128k", audio_path],
+        check=True,
+    )
+    return image_path, audio_path
+
+
+def run_benchmark(image_path: str, audio_path: str, runs: int, threads: int, directory: str) -> list:
+    results = []
+    for label, options in PROFILES:
+        options = {"preset": VIDEO_PRESET, **options}
+        if options["profile"] == "still":
+            options["threads"] = threads
+        timings = []
+        output_path = os.path.join(directory, f"{label.replace(', ', '_')}.mp4")
+        for _ in range(runs):
+            start = time.perf_counter()
+            create_video_from_image_and_audio(image_path, audio_path, output_path, **options)
+            timings.append(time.perf_counter() - start)
+        results.append((label, min(timings), sum(timings) / len(timings), os.path.getsize(output_path)))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ffmpeg profiles for the story video.")
+    parser.add_argument("--image", help="image to encode (generated if omitted)")
+    parser.add_argument("--audio", help="MP3 to encode (generated if omitted)")
+    parser.add_argument("--duration", type=int, default=180, help="length of the generated audio in seconds")
+    parser.add_argument("--runs", type=int, default=1, help="encodes per profile")
+    parser.add_argument("--threads", type=int, default=None, help="ffmpeg threads for the still profiles")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.image and args.audio:
+            image_path, audio_path = args.image, args.audio
+        else:
+            image_path, audio_path = _make_inputs(directory, args.duration)
+        results = run_benchmark(image_path, audio_path, args.runs, args.threads, directory)
+
+    baseline = results[0][1]
+    print(f"{'profile':<26}{'best s':>9}{'mean s':>9}{'speedup':>9}{'size MB':>10}")
+    for label, best, mean, size in results:
+        print(f"{label:<26}{best:>9.2f}{mean:>9.2f}{baseline / best:>8.1f}x{size / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
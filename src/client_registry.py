@@ -0,0 +1,97 @@
+import threading
+import weakref
+from typing import Dict, Tuple
+
+import httpx
+from openai import AzureOpenAI, DefaultHttpxClient
+from config import AZURE_ENDPOINT, API_KEY
+from logger import logger
+
+# Connection pool settings shared by all Azure OpenAI clients
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 120.0
+REQUEST_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+
+class ConnectionStats:
+    """
+    Counts requests made through a client and how many of them reused an open connection.
+    Connections are recognised by the network stream object httpcore attaches to each response.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+        self._streams = weakref.WeakSet()
+
+    def on_response(self, response: httpx.Response) -> None:
+        stream = response.extensions.get("network_stream")
+        with self._lock:
+            self.requests += 1
+            if stream is None:
+                return
+            if stream not in self._streams:
+                self._streams.add(stream)
+                self.new_connections += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.requests - self.new_connections,
+        }
+
+
+_lock = threading.Lock()
+_clients: Dict[Tuple[str, str], AzureOpenAI] = {}
+_stats: Dict[Tuple[str, str], ConnectionStats] = {}
+
+
+def get_openai_client(api_version: str, azure_endpoint: str = AZURE_ENDPOINT) -> AzureOpenAI:
+    """
+    Returns the long-lived AzureOpenAI client for the endpoint and API version.
+
+    Each client owns a pooled httpx transport with keep-alive, so repeated generation
+    calls (and concurrent batch workers) share connections and TLS sessions.
+    """
+    key = (azure_endpoint, api_version)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            stats = _stats[key] = ConnectionStats()
+            http_client = DefaultHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+                timeout=REQUEST_TIMEOUT,
+                event_hooks={"response": [stats.on_response]},
+            )
+            client = _clients[key] = AzureOpenAI(
+                api_version=api_version, azure_endpoint=azure_endpoint, api_key=API_KEY, http_client=http_client
+            )
+            logger.debug(f"Created Azure OpenAI client for {azure_endpoint} ({api_version})")
+        return client
+
+
+def connection_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Returns connection reuse counters for every client, keyed by "endpoint (api_version)".
+    """
+    with _lock:
+        return {f"{endpoint} ({version})": stats.as_dict() for (endpoint, version), stats in _stats.items()}
+
+
+def close_clients() -> None:
+    """
+    Closes all pooled clients, logging their connection reuse counters.
+    """
+    with _lock:
+        for (endpoint, version), client in _clients.items():
+            logger.info(f"Azure OpenAI {endpoint} ({version}) connections: {_stats[(endpoint, version)].as_dict()}")
+            client.close()
+        _clients.clear()
+        _stats.clear()
@@ -0,0 +1,87 @@
+import random
+import threading
+from typing import Callable, Optional, Sequence, Tuple
+
+
+class ComboSampler:
+    """
+    Draws unused animal and mood combinations without rejection sampling.
+
+    All unused combinations are enumerated once, packed as `animal_index * len(moods) + mood_index`.
+    A draw picks a random slot and swaps it with the last one, so every draw is O(1) and never
+    returns a combination twice.
+    """
+
+    def __init__(
+        self,
+        animals: Sequence[str],
+        moods: Sequence[str],
+        is_used: Callable[[str], bool],
+        rng: Optional[random.Random] = None,
+    ):
+        self._animals = list(animals)
+        self._moods = list(moods)
+        self._animal_ids = {animal: index for index, animal in enumerate(self._animals)}
+        self._mood_ids = {mood: index for index, mood in enumerate(self._moods)}
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        mood_count = len(self._moods)
+        self._unused = [
+            index for index in range(len(self._animals) * mood_count)
+            if not is_used(f"{self._animals[index // mood_count]}|{self._moods[index % mood_count]}")
+        ]
+        self._positions = {index: position for position, index in enumerate(self._unused)}
+
+    @property
+    def total(self) -> int:
+        return len(self._animals) * len(self._moods)
+
+    @property
+    def remaining(self) -> int:
+        return len(self._unused)
+
+    def _combo(self, index: int) -> Tuple[str, str]:
+        mood_count = len(self._moods)
+        return self._animals[index // mood_count], self._moods[index % mood_count]
+
+    def _index(self, animal: str, mood: str) -> Optional[int]:
+        if animal not in self._animal_ids or mood not in self._mood_ids:
+            return None
+        return self._animal_ids[animal] * len(self._moods) + self._mood_ids[mood]
+
+    def _remove_at(self, position: int) -> int:
+        index = self._unused[position]
+        last = self._unused.pop()
+        del self._positions[index]
+        if last != index:
+            self._unused[position] = last
+            self._positions[last] = position
+        return index
+
+    def draw(self) -> Optional[Tuple[str, str]]:
+        """
+        Removes and returns a random unused (animal, mood) pair, or None when exhausted.
+        """
+        with self._lock:
+            if not self._unused:
+                return None
+            return self._combo(self._remove_at(self._rng.randrange(len(self._unused))))
+
+    def discard(self, animal: str, mood: str) -> None:
+        """
+        Marks a combination as used without drawing it.
+        """
+        index = self._index(animal, mood)
+        with self._lock:
+            if index in self._positions:
+                self._remove_at(self._positions[index])
+
+    def restore(self, animal: str, mood: str) -> None:
+        """
+        Puts a drawn combination back, e.g. when generating content for it failed.
+        """
+        index = self._index(animal, mood)
+        with self._lock:
+            if index is not None and index not in self._positions:
+                self._positions[index] = len(self._unused)
+                self._unused.append(index)
@@ -1,45 +1,483 @@
 import os
+import re
+import time
 import uuid
+import queue
 import random
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from elevenlabs.client import ElevenLabs
 from config import ELEVENLABS_API_KEY
 from logger import logger
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AUDIO_DIR = os.path.join(BASE_DIR, "audio_files")
+AUDIO_CACHE_DIR = os.path.join(BASE_DIR, "audio_cache")
+AUDIO_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+VOICES = {"Klára": "5dDTFgDe7eMVxZHZObuz", "Jan": "Eqzdg80VS88UO6BmC97d"}
+OUTPUT_FORMAT = "mp3_44100_128"
+
+# Delší texty se syntetizují po částech, souběžně
+MAX_CHUNK_CHARS = 2500
+MAX_CHUNK_WORKERS = 4
+CHUNK_RETRIES = 3
+CHUNK_RETRY_DELAY = 2
+
+SENTENCE_END = re.compile(r'(?<=[.!?…])\s+')
 
 client = ElevenLabs(
     api_key=ELEVENLABS_API_KEY,
 )
 
 
-def generate_audio(text: str, model_id: str = "eleven_flash_v2_5") -> str:
+class AudioCache:
     """
-    Vygeneruje audio z textu pomocí ElevenLabs API, uloží ho s náhodným názvem (UUID)
-    a vrátí absolutní cestu k souboru.
+    Diskový LRU cache syntetizovaného audia. Klíčem je hash textu, hlasu, modelu
+    a výstupního formátu, takže stejný text se u ElevenLabs neplatí dvakrát.
+
+    Každá položka je jeden MP3 soubor; čas posledního použití se drží v mtime souboru.
+    Po překročení max_bytes se mažou nejdéle nepoužité položky.
     """
-    voice_dict = {"Klára": "5dDTFgDe7eMVxZHZObuz", "Jan": "Eqzdg80VS88UO6BmC97d"}
 
-    selected_name, voice_id = random.choice(list(voice_dict.items()))
+    def __init__(self, root: str, max_bytes: int = AUDIO_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def key(text: str, voice_id: str, model_id: str, output_format: str = OUTPUT_FORMAT) -> str:
+        digest = hashlib.sha256()
+        for part in (text, voice_id, model_id, output_format):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.mp3")
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for entry in os.scandir(self.root):
+            if not entry.name.endswith(".mp3"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Vrátí cestu k audiu v cache (a označí ho jako naposledy použité), nebo None.
+        """
+        path = self._path(key)
+        with self._lock:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            self.hits += 1
+        logger.info(f"Audio nalezeno v cache: {key[:12]}")
+        return path
+
+    def export(self, key: str, destination_path: str) -> bool:
+        """
+        Zkopíruje audio z cache do destination_path. Vrací False, pokud v cache není.
+        """
+        path = self.get(key)
+        if path is None:
+            return False
+        try:
+            shutil.copyfile(path, destination_path)
+        except FileNotFoundError:
+            # Mezitím vyřazeno jiným vláknem nebo procesem
+            return False
+        return True
+
+    def put_file(self, key: str, source_path: str) -> None:
+        """
+        Uloží kopii souboru do cache a vyřadí nejstarší položky nad limit velikosti.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Audio se nepodařilo uložit do cache: {e}")
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+            logger.info(f"Audio vyřazeno z cache: {os.path.basename(path)}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+audio_cache = AudioCache(AUDIO_CACHE_DIR)
+
+
+def choose_voice(text: str) -> Tuple[str, str]:
+    """
+    Vybere hlas podle textu. Stejný příběh tak vždy dostane stejný hlas, různé příběhy
+    se mezi hlasy rozloží rovnoměrně, a audio cache může zasáhnout.
+    """
+    names = sorted(VOICES)
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    selected_name = names[int.from_bytes(digest[:8], "big") % len(names)]
+    voice_id = VOICES[selected_name]
     logger.info(f"Vybrán: {selected_name} s voice ID: {voice_id}")
-    audio_generator = client.text_to_speech.convert(
+    return selected_name, voice_id
+
+
+def synthesize_stream(text: str, model_id: str = "eleven_flash_v2_5", voice_id: str = None) -> Iterator[bytes]:
+    """
+    Spustí syntézu řeči a vrátí generátor MP3 bloků tak, jak přicházejí z ElevenLabs API.
+    """
+    voice_id = voice_id or choose_voice(text)[1]
+    return client.text_to_speech.convert(
         voice_id=voice_id,
-        output_format="mp3_44100_128",
+        output_format=OUTPUT_FORMAT,
         text=text,
         model_id=model_id,
     )
 
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Rozdělí text po slovech na části kratší než max_chars (pro extrémně dlouhé věty)."""
+    parts, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            parts.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_text(text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    """
+    Rozdělí text na části do max_chars znaků. Dělí se přednostně na hranicích odstavců,
+    dlouhé odstavce na hranicích vět a teprve extrémně dlouhé věty mezi slovy.
+    """
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append((paragraph, "\n\n"))
+            continue
+        for sentence in SENTENCE_END.split(paragraph):
+            if len(sentence) <= max_chars:
+                pieces.append((sentence, " "))
+            else:
+                pieces.extend((part, " ") for part in _split_long(sentence, max_chars))
+        pieces[-1] = (pieces[-1][0], "\n\n")
+
+    chunks, current, separator = [], "", ""
+    for piece, piece_separator in pieces:
+        if current and len(current) + len(separator) + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}{separator}{piece}" if current else piece
+        separator = piece_separator
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _synthesize_chunk(
+    index: int,
+    text: str,
+    voice_id: str,
+    model_id: str,
+    previous_text: Optional[str] = None,
+    next_text: Optional[str] = None,
+    retries: int = CHUNK_RETRIES,
+    delay: float = CHUNK_RETRY_DELAY,
+    limit: Optional[threading.Semaphore] = None,
+) -> bytes:
+    """
+    Syntetizuje jednu část textu, při chybě ji opakuje s exponenciálním čekáním.
+    Okolní text (previous_text/next_text) pomáhá zachovat plynulou intonaci na hranicích částí.
+    Semafor `limit` se drží jen po dobu jednotlivého požadavku, ne během čekání na opakování.
+    """
+    context = {}
+    if previous_text:
+        context["previous_text"] = previous_text
+    if next_text:
+        context["next_text"] = next_text
+    for attempt in range(1, retries + 1):
+        start = time.perf_counter()
+        try:
+            with limit or nullcontext():
+                audio = b"".join(client.text_to_speech.convert(
+                    voice_id=voice_id,
+                    output_format=OUTPUT_FORMAT,
+                    text=text,
+                    model_id=model_id,
+                    **context,
+                ))
+        except Exception as e:
+            logger.error(f"Část {index}: pokus {attempt} o syntézu selhal: {e}")
+            if attempt == retries:
+                raise
+            time.sleep(random.uniform(0, delay * 2 ** (attempt - 1)))
+            continue
+        logger.info(
+            f"Část {index}: {len(text)} znaků syntetizováno za {time.perf_counter() - start:.2f} s "
+            f"({len(audio)} B, pokus {attempt})"
+        )
+        return audio
+
+
+def _strip_id3(data: bytes, keep_header: bool, keep_footer: bool) -> bytes:
+    """
+    Odstraní ID3 tagy z MP3 segmentu, aby spojení segmentů bylo čistým sledem MP3 rámců.
+    """
+    if not keep_header and data[:3] == b"ID3" and len(data) >= 10:
+        size = 0
+        for byte in data[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer:]
+    if not keep_footer and len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+def concatenate_mp3(segments: List[bytes]) -> bytes:
+    """
+    Bezeztrátově spojí MP3 segmenty stejného formátu (bez překódování). Tagy zůstávají jen
+    na začátku prvního a na konci posledního segmentu.
+    """
+    last = len(segments) - 1
+    return b"".join(
+        _strip_id3(segment, keep_header=index == 0, keep_footer=index == last)
+        for index, segment in enumerate(segments)
+    )
+
+
+def synthesize_chunked(
+    text: str,
+    model_id: str = "eleven_flash_v2_5",
+    max_chars: int = MAX_CHUNK_CHARS,
+    max_workers: int = MAX_CHUNK_WORKERS,
+    use_context: bool = True,
+    voice_id: str = None,
+    limit: Optional[threading.Semaphore] = None,
+) -> bytes:
+    """
+    Rozdělí text na části, syntetizuje je souběžně stejným hlasem a vrátí spojené MP3.
+    Neúspěšné části se opakují jednotlivě, ostatní se kvůli nim negenerují znovu.
+    Sdílený semafor `limit` (např. limit poskytovatele "elevenlabs" celé dávky) omezuje
+    počet souběžných požadavků napříč všemi články, ne jen v rámci jednoho textu.
+    """
+    chunks = split_text(text, max_chars)
+    if not chunks:
+        raise ValueError("Text pro syntézu řeči je prázdný.")
+    voice_id = voice_id or choose_voice(text)[1]
+    start = time.perf_counter()
+
+    def synthesize(index: int) -> bytes:
+        previous_text = chunks[index - 1] if use_context and index > 0 else None
+        next_text = chunks[index + 1] if use_context and index + 1 < len(chunks) else None
+        return _synthesize_chunk(index, chunks[index], voice_id, model_id, previous_text, next_text, limit=limit)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks))), thread_name_prefix="tts") as pool:
+        segments = list(pool.map(synthesize, range(len(chunks))))
+    logger.info(f"Syntéza {len(chunks)} částí ({len(text)} znaků) trvala {time.perf_counter() - start:.2f} s")
+    return concatenate_mp3(segments)
+
+
+def _new_audio_path() -> str:
     # Uložíme audio do složky "audio_files" ve stejném adresáři jako tento skript
-    audio_dir = os.path.join(BASE_DIR, "audio_files")
-    os.makedirs(audio_dir, exist_ok=True)
+    os.makedirs(AUDIO_DIR, exist_ok=True)
     filename = f"{uuid.uuid4()}.mp3"
-    file_path = os.path.join(audio_dir, filename)
+    return os.path.join(AUDIO_DIR, filename)
 
+
+def generate_audio(
+    text: str,
+    model_id: str = "eleven_flash_v2_5",
+    limit: Optional[threading.Semaphore] = None,
+) -> str:
+    """
+    Vygeneruje audio z textu pomocí ElevenLabs API, uloží ho s náhodným názvem (UUID)
+    a vrátí absolutní cestu k souboru. Dlouhý text se syntetizuje po částech souběžně,
+    každý požadavek drží semafor `limit`; již syntetizovaný text se vezme z audio cache.
+    """
+    _, voice_id = choose_voice(text)
+    cache_key = AudioCache.key(text, voice_id, model_id)
+    file_path = _new_audio_path()
+    if audio_cache.export(cache_key, file_path):
+        return file_path
+
+    audio = synthesize_chunked(text, model_id, voice_id=voice_id, limit=limit)
     with open(file_path, "wb") as f:
-        for chunk in audio_generator:
-            f.write(chunk)
+        f.write(audio)
+    audio_cache.put_file(cache_key, file_path)
     return file_path
 
 
+def _read_chunks(file_path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class ChunkTee:
+    """
+    Rozdělí jeden proud bloků na několik nezávislých iterátorů (větví).
+
+    Zdroj čte vlákno na pozadí a každý blok vloží do fronty každé větve. Fronty jsou
+    omezené, takže pomalý odběratel zpomalí zdroj místo hromadění dat v paměti.
+    Větev, jejíž odběratel skončil nebo selhal, se odpojí a dál nic nedostává.
+    """
+
+    _END = object()
+
+    def __init__(self, source: Iterator[bytes], branches: int, max_buffered_chunks: int = 256):
+        self._source = source
+        self._queues = [queue.Queue(maxsize=max_buffered_chunks) for _ in range(branches)]
+        self._detached = [threading.Event() for _ in range(branches)]
+        self._thread = threading.Thread(target=self._pump, name="audio-tee", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _put(self, index: int, item: Any) -> None:
+        while not self._detached[index].is_set():
+            try:
+                self._queues[index].put(item, timeout=0.05)
+                return
+            except queue.Full:
+                continue
+
+    def _pump(self) -> None:
+        try:
+            for chunk in self._source:
+                for index in range(len(self._queues)):
+                    self._put(index, chunk)
+            end = self._END
+        except Exception as e:
+            logger.error(f"Chyba při čtení audio proudu: {e}")
+            end = e
+        for index in range(len(self._queues)):
+            self._put(index, end)
+
+    def branch(self, index: int) -> Iterator[bytes]:
+        while True:
+            item = self._queues[index].get()
+            if item is self._END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def detach(self, index: int) -> None:
+        self._detached[index].set()
+
+
+def _hold_while_streaming(source: Iterator[bytes], limit: threading.Semaphore) -> Iterator[bytes]:
+    with limit:
+        yield from source
+
+
+def generate_audio_streaming(
+    text: str,
+    consumers: Dict[str, Callable[[Iterator[bytes]], Any]],
+    model_id: str = "eleven_flash_v2_5",
+    limit: Optional[threading.Semaphore] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Syntetizuje audio a během syntézy posílá bloky současně na disk a všem odběratelům
+    (např. nahrávání na WordPress nebo stdin ffmpeg), každému v samostatném vlákně.
+
+    Vrací cestu k uloženému MP3 a výsledky odběratelů; pokud odběratel selže, je jeho
+    výsledkem výjimka. Selhání syntézy nebo zápisu na disk se vyhodí. Audio z cache
+    se odběratelům posílá přímo ze souboru. Semafor `limit` se drží, dokud běží syntéza.
+    """
+    _, voice_id = choose_voice(text)
+    cache_key = AudioCache.key(text, voice_id, model_id)
+    cached_path = audio_cache.get(cache_key)
+    if cached_path:
+        source = _read_chunks(cached_path)
+    else:
+        source = synthesize_stream(text, model_id, voice_id=voice_id)
+        if limit is not None:
+            source = _hold_while_streaming(source, limit)
+    names = list(consumers)
+    tee = ChunkTee(source, len(names) + 1)
+    results: Dict[str, Any] = {}
+
+    def run(index: int, name: str) -> None:
+        try:
+            results[name] = consumers[name](tee.branch(index))
+        except Exception as e:
+            logger.error(f"Odběratel audio proudu '{name}' selhal: {e}")
+            results[name] = e
+        finally:
+            tee.detach(index)
+
+    threads = [
+        threading.Thread(target=run, args=(index, name), name=f"audio-{name}", daemon=True)
+        for index, name in enumerate(names)
+    ]
+    tee.start()
+    for thread in threads:
+        thread.start()
+
+    file_path = _new_audio_path()
+    disk_branch = len(names)
+    try:
+        with open(file_path, "wb") as f:
+            for chunk in tee.branch(disk_branch):
+                f.write(chunk)
+    finally:
+        tee.detach(disk_branch)
+        for thread in threads:
+            thread.join()
+    if not cached_path:
+        audio_cache.put_file(cache_key, file_path)
+    return file_path, results
+
+
 if __name__ == "__main__":
     sample_text = "Ahoj, jak se máš?"
     audio_path = generate_audio(sample_text)
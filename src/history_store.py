@@ -0,0 +1,86 @@
+import os
+import json
+import sqlite3
+import threading
+from typing import Iterator, Optional
+from logger import logger
+
+
+class HistoryStore:
+    """
+    Persistent set of already published animal identifiers backed by SQLite.
+
+    Identifiers are the primary key, so inserts are atomic and safe when several
+    processes share the database. Known identifiers are also kept in memory, which
+    makes repeated membership checks free of disk access.
+    """
+
+    def __init__(self, db_path: str, legacy_json_path: Optional[str] = None):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS selected_animals ("
+            "identifier TEXT PRIMARY KEY, created_at TEXT DEFAULT CURRENT_TIMESTAMP)"
+        )
+        if legacy_json_path:
+            self._import_legacy_json(legacy_json_path)
+        self._known = {row[0] for row in self._connection.execute("SELECT identifier FROM selected_animals")}
+
+    def _import_legacy_json(self, json_path: str) -> None:
+        """
+        Copies identifiers from the old selected_animals.json into an empty database.
+        """
+        if not os.path.exists(json_path):
+            return
+        if self._connection.execute("SELECT 1 FROM selected_animals LIMIT 1").fetchone():
+            return
+        try:
+            with open(json_path, "r", encoding="utf-8") as file:
+                identifiers = json.load(file)
+        except json.JSONDecodeError:
+            logger.error("Error reading JSON from history file.")
+            return
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO selected_animals (identifier) VALUES (?)",
+                ((identifier,) for identifier in identifiers),
+            )
+            self._connection.execute("COMMIT")
+        logger.info(f"Imported {len(identifiers)} identifiers from {json_path}")
+
+    def add(self, identifier: str) -> bool:
+        """
+        Records an identifier. Returns False if it was already present, including
+        when another process inserted it first.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT OR IGNORE INTO selected_animals (identifier) VALUES (?)", (identifier,)
+            )
+            self._known.add(identifier)
+            return cursor.rowcount == 1
+
+    def __contains__(self, identifier: str) -> bool:
+        if identifier in self._known:
+            return True
+        # Another process may have inserted it since we loaded the set
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM selected_animals WHERE identifier = ?", (identifier,)
+            ).fetchone()
+        if row:
+            self._known.add(identifier)
+        return row is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._known))
+
+    def __len__(self) -> int:
+        return len(self._known)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
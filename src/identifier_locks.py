@@ -0,0 +1,53 @@
+import os
+import fcntl
+import threading
+from typing import Dict
+from artifact_store import artifact_key
+
+
+class IdentifierLocks:
+    """
+    Cross-process reservations of article identifiers, one lock file per identifier.
+
+    A reservation holds an exclusive flock() on the identifier's file, so it is atomic
+    across processes (overlapping cron runs, `generate` next to `run`) and disappears
+    with the process if that dies, without any stale-lock cleanup. Lock files are never
+    deleted: removing a file another process is about to lock would let two processes
+    hold the "same" lock.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._held: Dict[str, int] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, identifier: str) -> str:
+        return os.path.join(self.root, artifact_key(identifier) + ".lock")
+
+    def acquire(self, identifier: str) -> bool:
+        """
+        Reserves the identifier. Returns False if this or another process already holds it.
+        """
+        with self._lock:
+            if identifier in self._held:
+                return False
+            fd = os.open(self._path(identifier), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            self._held[identifier] = fd
+            return True
+
+    def release(self, identifier: str) -> None:
+        with self._lock:
+            fd = self._held.pop(identifier, None)
+        if fd is not None:
+            # Closing the descriptor drops the flock
+            os.close(fd)
+
+    def __contains__(self, identifier: str) -> bool:
+        with self._lock:
+            return identifier in self._held
@@ -0,0 +1,131 @@
+import os
+import json
+import uuid
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from logger import logger
+
+# Publishing progress of an article, in order
+JOB_STATES = (
+    "created",
+    "generated",
+    "media_uploaded",
+    "audio_uploaded",
+    "posted",
+    "video_encoded",
+    "youtube_uploaded",
+)
+
+# Values that have to be present for each state to be reached
+STATE_REQUIREMENTS = {
+    "generated": ("story", "image_path", "audio_path"),
+    "media_uploaded": ("image_attachment_id",),
+    "audio_uploaded": ("audio_html",),
+    "posted": ("post",),
+    "video_encoded": ("video_path",),
+    "youtube_uploaded": ("youtube_video_id",),
+}
+
+
+class Job:
+    """
+    Persisted record of one article going through the publish pipeline.
+
+    Stage outputs are stored in `values` as soon as they are produced, so a resumed
+    run can seed the pipeline with them and skip every stage that already finished.
+    """
+
+    def __init__(self, store: "JobStore", job_id: str, values: Optional[Dict[str, Any]] = None):
+        self.store = store
+        self.id = job_id
+        self.values: Dict[str, Any] = values or {}
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        reached = JOB_STATES[0]
+        for state in JOB_STATES[1:]:
+            if not all(self.values.get(name) is not None for name in STATE_REQUIREMENTS[state]):
+                break
+            reached = state
+        return reached
+
+    @property
+    def finished(self) -> bool:
+        return self.state == JOB_STATES[-1]
+
+    def record(self, stage_name: str, produced: Dict[str, Any]) -> None:
+        """
+        Stores the values produced by a stage and persists the job. Usable as the
+        on_values callback of run_pipeline.
+        """
+        with self._lock:
+            previous = self.state
+            self.values.update({name: value for name, value in produced.items() if value is not None})
+            self.store.save(self)
+            if self.state != previous:
+                logger.info(f"Job {self.id}: {previous} -> {self.state}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "values": self.values,
+        }
+
+
+class JobStore:
+    """
+    Directory of JSON job records, one file per article.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.root, f"{job_id}.json")
+
+    def create(self) -> Job:
+        job = Job(self, uuid.uuid4().hex)
+        self.save(job)
+        return job
+
+    def save(self, job: Job) -> None:
+        path = self._path(job.id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(job.to_dict(), file, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, path)
+
+    def load(self, job_id: str) -> Job:
+        with open(self._path(job_id), "r", encoding="utf-8") as file:
+            data = json.load(file)
+        return Job(self, data["id"], data.get("values"))
+
+    def unfinished(self) -> List[Job]:
+        """
+        Returns all stored jobs that have not reached the final state, oldest first.
+        """
+        jobs = []
+        names = sorted(
+            (name for name in os.listdir(self.root) if name.endswith(".json")),
+            key=lambda name: os.path.getmtime(os.path.join(self.root, name)),
+        )
+        for name in names:
+            try:
+                job = self.load(name[:-len(".json")])
+            except (OSError, json.JSONDecodeError, KeyError) as e:
+                logger.warning(f"Skipping unreadable job record {name}: {e}")
+                continue
+            if not job.finished:
+                jobs.append(job)
+        return jobs
+
+    def remove(self, job: Job) -> None:
+        try:
+            os.remove(self._path(job.id))
+        except FileNotFoundError:
+            pass
@@ -1,117 +1,521 @@
 import os
-import base64
+import argparse
 import uuid
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Optional
 
-from ai_content_generator import generate_unique_animal_content
+from ai_content_generator import (
+    generate_unique_story,
+    validate_and_correct_output,
+    generate_image,
+    save_selected_animal,
+    hold_animal,
+    release_animal,
+    artifact_store,
+    DuplicateArticleError,
+    BASE_DIR,
+    VALIDATION_MODES,
+)
+from article_queue import ArticleQueue
 from wordpress_client import WordpressClient
 from logger import logger
-from elevenlabs_client import generate_audio
+from elevenlabs_client import generate_audio, generate_audio_streaming
 from helper import strip_html_tags, combine_content, cleanup_file, cleanup_directory
+from client_registry import close_clients
+from job_store import Job, JobStore
+from pipeline import Stage, PipelineError, run_pipeline, provider_limits
+from render_pool import RenderPool
 
 # Import functions from the YouTube uploader module
-from youtube_uploader import create_video_from_image_and_audio, upload_video_to_youtube
+from youtube_uploader import upload_video_to_youtube
 
-def post_ai_article():
-    try:
-        title, story, image_path = generate_unique_animal_content()
-        logger.debug(f"Title: {title}, story (first 100 chars): {story[:100]}, image path: {image_path}")
-    except Exception as e:
-        logger.error(f"Error generating content: {e}")
-        return
+JOBS_DIR = os.path.join(BASE_DIR, "jobs")
+job_store = JobStore(JOBS_DIR)
 
-    client = WordpressClient()
+QUEUE_DIR = os.path.join(BASE_DIR, "queue")
+article_queue = ArticleQueue(QUEUE_DIR)
 
-    # 1. Upload the featured image (thumbnail) to WordPress
-    try:
-        with open(image_path, 'rb') as image_file:
-            base64_image = base64.b64encode(image_file.read())
-            image_name = uuid.uuid4().hex + ".png"
-            image_attachment_id = client.upload_image(base64_image, image_name)
-            image_url = client.get_media_url(image_attachment_id)
-            logger.info(f"Image uploaded, URL: {image_url}")
-    except Exception as e:
-        logger.error(f"Error uploading image: {e}")
-        return
+# Stages that only produce local content; the rest of the pipeline uploads it
+GENERATION_STAGES = ("story", "validate", "image", "mark_selected", "audio", "video")
+# Generated values stored with a queued article, and which of them are files
+QUEUED_VALUES = ("identifier", "animal", "mood", "title", "draft_story", "story")
+QUEUED_FILES = ("image_path", "audio_path", "video_path")
 
-    # 2. Clean the story text and generate audio from it
-    story_clean = strip_html_tags(story)
-    try:
-        audio_file_path = generate_audio(story_clean)
-        logger.info(f"Audio generated: {audio_file_path}")
-    except Exception as e:
-        logger.error(f"Error generating audio: {e}")
-        return
+# Shared by all articles of a run; encodes run in the background with capped ffmpeg threads
+render_pool = RenderPool()
+
+# Default number of concurrent calls per provider in batch runs
+PROVIDER_LIMITS = {
+    "azure_openai": 4,
+    "dalle": 2,
+    "elevenlabs": 2,
+    "wordpress": 4,
+    "youtube": 1,
+    "ffmpeg": render_pool.max_jobs,
+}
+
+
+def _generate_story(emit, stream: bool = True, self_edit: bool = False):
+    def on_title(animal: str, mood: str, title: str) -> None:
+        emit(animal=animal, mood=mood, title=title)
+
+    _, _, identifier, _, story = generate_unique_story(stream=stream, on_title=on_title, self_edit=self_edit)
+    return identifier, story
+
+
+def _validate_story(identifier: str, draft_story: str, mode: str = "full") -> str:
+    return validate_and_correct_output(draft_story, owner=identifier, mode=mode)
+
+
+def _generate_image(animal: str, mood: str, title: str) -> str:
+    image_path = generate_image(animal, mood, title)
+    if not image_path:
+        raise RuntimeError("Image generation failed.")
+    return image_path
+
+
+def _mark_selected(identifier: str, image_path: str) -> bool:
+    # The identifier stays reserved until the article returns, its pending artifacts
+    # must not be picked up by another article while it is still being published
+    save_selected_animal(identifier)
+    # Recorded in the job, so a resumed job skips this stage
+    return True
+
+
+def _upload_image(wordpress: WordpressClient, image_path: str):
+    image_name = uuid.uuid4().hex + ".png"
+    media = wordpress.upload_file(image_path, image_name, "image/png")
+    # Answered from the upload response, no extra request on the happy path
+    image_url = wordpress.get_media_url(media.id)
+    logger.info(f"Image uploaded, URL: {image_url}")
+    return media.id, image_url
 
-    # 3. Upload the audio file and get its URL for embedding in the WordPress post
+
+def _generate_audio(story: str, limit: Optional[threading.BoundedSemaphore] = None) -> str:
+    # A resumed article finds its audio in the audio cache, keyed on text, voice and model
+    audio_file_path = generate_audio(strip_html_tags(story), limit=limit)
+    logger.info(f"Audio generated: {audio_file_path}")
+    return audio_file_path
+
+
+def _upload_audio(wordpress: WordpressClient, audio_path: str) -> str:
+    # A failed audio upload only drops the player from the post
     try:
-        with open(audio_file_path, 'rb') as audio_file:
-            base64_audio = base64.b64encode(audio_file.read())
-            audio_filename = uuid.uuid4().hex + ".mp3"
-            audio_attachment_id = client.upload_audio(base64_audio, audio_filename)
-            audio_url = client.get_media_url(audio_attachment_id)
-            audio_html = f'[audio src="{audio_url}"]'
-            logger.info(f"Audio uploaded, URL: {audio_url}")
+        audio_filename = uuid.uuid4().hex + ".mp3"
+        media = wordpress.upload_file(audio_path, audio_filename, "audio/mpeg")
+        audio_url = wordpress.get_media_url(media.id)
+        logger.info(f"Audio uploaded, URL: {audio_url}")
+        return f'[audio src="{audio_url}"]'
     except Exception as e:
         logger.error(f"Error uploading audio: {e}")
-        audio_html = ""
+        return ""
 
-    # 4. Combine story and audio player HTML to form the post content
-    combined_content = combine_content(story, audio_html)
 
-    # 5. Create the post on WordPress with the featured image set
-    try:
-        data = {
-            "title": title,
-            "content": combined_content,
-            "status": "publish",
-            "categories": [17],  # adjust category ID as needed
-            "featured_media": image_attachment_id
-        }
-        post_url = f"{client.base_url}/wp-json/wp/v2/posts"
-        response = requests.post(post_url, auth=client.auth, json=data)
-        if response.status_code == 201:
-            logger.info(f"Post published on WordPress, title: {title}")
-        else:
-            logger.error(f"Error creating WordPress post: {response.status_code}")
-            logger.error(response.text)
-            return
-    except Exception as e:
-        logger.error(f"Error publishing WordPress post: {e}")
-        return
+def _create_post(wordpress: WordpressClient, title: str, story: str, audio_html: str, image_attachment_id: int) -> dict:
+    post = wordpress.publish_post(
+        title,
+        combine_content(story, audio_html),
+        categories=[17],  # adjust category ID as needed
+        featured_image=image_attachment_id,
+    )
+    logger.info(f"Post published on WordPress, title: {title}")
+    # Only what is needed to resume the job is kept
+    return {"id": post.get("id"), "link": post.get("link")}
 
-    # 6. Create a video from the image and audio for YouTube upload
+
+def _new_video_path() -> str:
     video_dir = os.path.join(os.getcwd(), "videos")
     os.makedirs(video_dir, exist_ok=True)
-    video_path = os.path.join(video_dir, f"{uuid.uuid4().hex}.mp4")
+    return os.path.join(video_dir, f"{uuid.uuid4().hex}.mp4")
+
+
+def _create_video(image_path: str, audio_path: str) -> str:
+    video_path = _new_video_path()
+    render_pool.render(image_path, audio_path, video_path)
+    return video_path
+
+
+def _create_video_or_none(image_path: str, audio_path: str, limit: Optional[threading.BoundedSemaphore] = None):
     try:
-        create_video_from_image_and_audio(image_path, audio_file_path, video_path)
+        with limit or nullcontext():
+            return _create_video(image_path, audio_path)
     except Exception as e:
         logger.error(f"Error creating video: {e}")
-        video_path = None
-
-    # 7. Upload the video to YouTube (if the video was successfully created)
-    if video_path:
-        try:
-            youtube_video_id = upload_video_to_youtube(
-                video_path,
-                title=title,
-                description=strip_html_tags(story),
-                tags=["AI", "FairyTale", "Animal"]
-            )
-            logger.info(f"Video uploaded to YouTube with video ID: {youtube_video_id}")
-        except Exception as e:
-            logger.error(f"Error uploading video to YouTube: {e}")
+        return None
+
+
+def _stream_audio(
+    wordpress: WordpressClient,
+    story: str,
+    image_path: str,
+    limits: Optional[dict] = None,
+):
+    """
+    Synthesizes the audio and, while the chunks arrive, uploads them to WordPress and
+    pipes them into ffmpeg. Whatever fails in the streamed path is redone from the MP3
+    that was written to disk alongside.
+    The "elevenlabs" slot of `limits` is only held while synthesizing and an "ffmpeg" slot
+    only while encoding. The streamed encode has to keep up with the synthesis, so it
+    only runs if an ffmpeg slot is free right away; otherwise the video is encoded from
+    the MP3 afterwards, waiting for a slot like the video stage.
+    """
+    limits = limits or {}
+    ffmpeg_limit = limits.get("ffmpeg")
+    audio_filename = uuid.uuid4().hex + ".mp3"
+    video_path = _new_video_path()
+    consumers = {"upload": lambda chunks: wordpress.upload_media(chunks, audio_filename, "audio/mpeg")}
+    stream_video = ffmpeg_limit is None or ffmpeg_limit.acquire(blocking=False)
+    if stream_video:
+        consumers["video"] = lambda chunks: render_pool.render_stream(image_path, chunks, video_path)
+    try:
+        audio_path, results = generate_audio_streaming(strip_html_tags(story), consumers,
+                                                       limit=limits.get("elevenlabs"))
+    finally:
+        if stream_video and ffmpeg_limit is not None:
+            ffmpeg_limit.release()
+    logger.info(f"Audio generated: {audio_path}")
+
+    if isinstance(results["upload"], Exception):
+        audio_html = _upload_audio(wordpress, audio_path)
+    else:
+        audio_url = wordpress.get_media_url(results["upload"].id)
+        logger.info(f"Audio uploaded, URL: {audio_url}")
+        audio_html = f'[audio src="{audio_url}"]'
+    if not stream_video or isinstance(results["video"], Exception):
+        video_path = _create_video_or_none(image_path, audio_path, ffmpeg_limit)
+    return audio_path, audio_html, video_path
+
+
+def _upload_video(post: dict, video_path: str, title: str, story: str) -> str:
+    # `post` is only consumed so that the video is never published without its article
+    if not video_path:
+        raise RuntimeError("No video file available for YouTube upload.")
+    youtube_video_id = upload_video_to_youtube(
+        video_path,
+        title=title,
+        description=strip_html_tags(story),
+        tags=["AI", "FairyTale", "Animal"]
+    )
+    logger.info(f"Video uploaded to YouTube with video ID: {youtube_video_id}")
+    return youtube_video_id
+
+
+def build_article_stages(
+    stream_story: bool = True,
+    stream_audio: bool = False,
+    validation: str = "full",
+    limits: Optional[dict] = None,
+) -> list:
+    """
+    Declares the article pipeline as a stage graph.
+
+    Image generation and speech synthesis only depend on the story, so they run side by
+    side; the video encode overlaps with the WordPress uploads and post creation.
+    With stream_story the story stage emits the title while the body is still being
+    written, so image generation starts early. With stream_audio the synthesized audio
+    is uploaded and encoded into the video while it is being generated.
+    `validation` is one of VALIDATION_MODES; "single_pass" has the story stage edit
+    its own draft and makes validation a no-op.
+    The audio stages take their "elevenlabs" and "ffmpeg" slots of `limits` themselves,
+    for each request or encode, instead of holding one slot for the whole stage: the
+    chunked synthesis sends several requests at once and the streamed one also encodes.
+    """
+    self_edit = validation == "single_pass"
+    elevenlabs_limit = (limits or {}).get("elevenlabs")
+    stages = [
+        Stage("story", lambda emit: _generate_story(emit, stream=stream_story, self_edit=self_edit),
+              outputs=("identifier", "draft_story"), emits=("animal", "mood", "title"),
+              provider="azure_openai"),
+        Stage("validate", lambda identifier, draft_story: _validate_story(identifier, draft_story, validation),
+              inputs=("identifier", "draft_story"), outputs=("story",),
+              provider="azure_openai"),
+        Stage("image", _generate_image, inputs=("animal", "mood", "title"), outputs=("image_path",),
+              provider="dalle"),
+        Stage("mark_selected", _mark_selected, inputs=("identifier", "image_path"), outputs=("selected",)),
+        Stage("upload_image", _upload_image, inputs=("wordpress", "image_path"),
+              outputs=("image_attachment_id", "image_url"), provider="wordpress"),
+        Stage("post", _create_post,
+              inputs=("wordpress", "title", "story", "audio_html", "image_attachment_id"),
+              outputs=("post",), provider="wordpress"),
+        Stage("youtube", _upload_video, inputs=("post", "video_path", "title", "story"),
+              outputs=("youtube_video_id",), optional=True, provider="youtube"),
+    ]
+    if stream_audio:
+        stages.append(
+            Stage("audio_stream",
+                  lambda wordpress, story, image_path: _stream_audio(wordpress, story, image_path, limits),
+                  inputs=("wordpress", "story", "image_path"),
+                  outputs=("audio_path", "audio_html", "video_path")),
+        )
     else:
-        logger.error("No video file available for YouTube upload.")
+        stages.extend([
+            Stage("audio", lambda story: _generate_audio(story, elevenlabs_limit),
+                  inputs=("story",), outputs=("audio_path",)),
+            Stage("upload_audio", _upload_audio, inputs=("wordpress", "audio_path"),
+                  outputs=("audio_html",), provider="wordpress"),
+            Stage("video", _create_video, inputs=("image_path", "audio_path"),
+                  outputs=("video_path",), optional=True, provider="ffmpeg"),
+        ])
+    return stages
+
+
+def post_ai_article(
+    wordpress: WordpressClient = None,
+    limits: dict = None,
+    job: Job = None,
+    stream_audio: bool = False,
+    validation: str = "full",
+    stages: list = None,
+) -> bool:
+    """
+    Generates and publishes one article. Returns True if the WordPress post was created.
+    Pass a shared client and provider limits when publishing several articles at once.
+
+    Progress is checkpointed in a job record; passing an unfinished job resumes it,
+    skipping every stage whose results (attachment IDs, post, video) are already known.
+    `stages` replaces the default stage graph, e.g. to only publish pre-generated content.
+    """
+    job = job or job_store.create()
+    try:
+        result = run_pipeline(
+            stages or build_article_stages(stream_audio=stream_audio, validation=validation, limits=limits),
+            initial={**job.values, "wordpress": wordpress or WordpressClient()},
+            limits=limits,
+            on_values=job.record,
+        )
+    except PipelineError as e:
+        logger.error(f"Error publishing article {job.id} ({job.state}): {e}")
+        if isinstance(e.error, DuplicateArticleError):
+            # Never to be finished; anything uploaded so far stays as unattached media
+            job_store.remove(job)
+            _abandon_article(e.values["identifier"])
+        elif not any(job.values.get(name) is not None for name in ("image_attachment_id", "audio_html", "post")):
+            # Nothing was uploaded yet; the artifact cache is enough to resume generation
+            job_store.remove(job)
+            if e.values.get("identifier"):
+                release_animal(e.values["identifier"])
+        return False
+
+    values = result.values
+    # The article is out, cached artifacts are no longer needed for a resume
+    artifact_store.clear_pending(values["identifier"])
+    release_animal(values["identifier"])
+    if not job.finished:
+        logger.warning(f"Job {job.id} stopped at '{job.state}', run with --resume to finish it.")
+        return True
+
+    job_store.remove(job)
+    # Clean up local files (image, audio, and video)
+    cleanup_file(values["image_path"])
+    cleanup_file(values["audio_path"])
+    if values.get("video_path"):
+        cleanup_file(values["video_path"])
+    if values.get("queue_item"):
+        article_queue.complete(values["queue_item"])
+    return True
 
-    # 8. Clean up local files (image, audio, and video)
-    cleanup_file(image_path)
-    cleanup_file(audio_file_path)
-    if video_path:
-        cleanup_file(video_path)
+
+def _abandon_article(identifier: str) -> None:
+    """
+    Drops an article whose identifier was published by another article, together with
+    its pending artifacts, so that it is not resumed either.
+    """
+    artifact_store.clear_pending(identifier)
+    release_animal(identifier)
+
+
+def cleanup_directories() -> None:
+    """
+    Removes the media directories if they are empty. Only called at the end of a run,
+    since concurrent articles may still be writing into them.
+    """
     cleanup_directory(os.path.join('.', 'images'))
     cleanup_directory(os.path.join('.', 'videos'))
 
+
+def hold_unfinished_jobs() -> list:
+    """
+    Reserves the identifiers of unfinished jobs so new articles never pick them up,
+    and returns those jobs. Jobs another process is working on are left out.
+    """
+    jobs = []
+    for job in job_store.unfinished():
+        identifier = job.values.get("identifier")
+        if identifier and not hold_animal(identifier):
+            logger.info(f"Skipping job {job.id}, '{identifier}' is held by another process.")
+            continue
+        jobs.append(job)
+    return jobs
+
+
+def post_ai_articles(
+    count: int,
+    concurrency: int = 2,
+    limits: dict = None,
+    jobs: list = None,
+    stream_audio: bool = False,
+    validation: str = "full",
+) -> int:
+    """
+    Publishes `count` articles with at most `concurrency` pipelines in flight.
+    If `jobs` are given, those unfinished jobs are resumed instead of starting new articles.
+    All pipelines share one WordPress client and the per-provider limits.
+    Returns the number of successfully published articles.
+    """
+    wordpress = WordpressClient()
+    semaphores = provider_limits({**PROVIDER_LIMITS, **(limits or {})})
+    jobs = jobs if jobs is not None else [None] * count
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="article") as pool:
+        futures = [
+            pool.submit(post_ai_article, wordpress, semaphores, job, stream_audio, validation) for job in jobs
+        ]
+        published = sum(1 for future in futures if future.result())
+    logger.info(f"Batch finished: {published}/{len(jobs)} articles published.")
+    logger.info(f"WordPress request timings: {wordpress.metrics.summary()}")
+    return published
+
+
+def generate_article(limits: dict = None, validation: str = "full") -> bool:
+    """
+    Generates one article (story, image, audio and video) without publishing it and
+    adds it to the article queue. Returns True if the article was queued.
+    """
+    stages = [
+        stage for stage in build_article_stages(validation=validation, limits=limits)
+        if stage.name in GENERATION_STAGES
+    ]
+    try:
+        result = run_pipeline(stages, limits=limits)
+    except PipelineError as e:
+        logger.error(f"Error generating article: {e}")
+        if isinstance(e.error, DuplicateArticleError):
+            _abandon_article(e.values["identifier"])
+        elif e.values.get("identifier"):
+            release_animal(e.values["identifier"])
+        return False
+
+    values = result.values
+    article_queue.put(
+        {name: values[name] for name in QUEUED_VALUES},
+        {name: values.get(name) for name in QUEUED_FILES},
+    )
+    # The queue keeps the files now, the artifact cache is no longer needed
+    artifact_store.clear_pending(values["identifier"])
+    release_animal(values["identifier"])
+    return True
+
+
+def publish_queued_article(wordpress: WordpressClient = None, limits: dict = None) -> Optional[bool]:
+    """
+    Publishes the oldest queued article, only running the upload stages.
+    Returns None if the queue is empty, otherwise whether the post was created.
+
+    The article is checkpointed in a job record like any other, so a publish that fails
+    after an upload is finished with --resume; one that fails before is put back in the queue.
+    """
+    article = article_queue.claim()
+    if article is None:
+        return None
+    logger.info(f"Publishing queued article {article.name}: {article.values.get('title')}")
+    job = job_store.create()
+    # queue_item lets a resumed job remove the article from the queue once it is done.
+    # The article was marked selected while generating; without the value a resumed
+    # job would run mark_selected again and abort on its own identifier
+    job.record("queue", {**article.values, "selected": True, "queue_item": article.name})
+    skipped = GENERATION_STAGES
+    if not article.values.get("video_path"):
+        # The encode failed while generating, retry it before the YouTube upload
+        skipped = tuple(name for name in GENERATION_STAGES if name != "video")
+    stages = [stage for stage in build_article_stages() if stage.name not in skipped]
+    published = post_ai_article(wordpress, limits, job=job, stages=stages)
+    if not published and job.state == "generated":
+        article_queue.release(article)
+    return published
+
+
+def _run_batch(task, count: int, concurrency: int, *args) -> int:
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="article") as pool:
+        futures = [pool.submit(task, *args) for _ in range(count)]
+        return sum(1 for future in futures if future.result())
+
+
+def generate_articles(count: int, concurrency: int = 2, limits: dict = None, validation: str = "full") -> int:
+    """
+    Fills the article queue with `count` new articles. Returns the number queued.
+    """
+    semaphores = provider_limits({**PROVIDER_LIMITS, **(limits or {})})
+    queued = _run_batch(generate_article, count, concurrency, semaphores, validation)
+    logger.info(f"Generation finished: {queued}/{count} articles queued, {len(article_queue)} waiting.")
+    return queued
+
+
+def publish_queued_articles(count: int, concurrency: int = 2, limits: dict = None) -> int:
+    """
+    Publishes up to `count` queued articles. Returns the number of published articles.
+    """
+    count = min(count, len(article_queue))
+    wordpress = WordpressClient()
+    semaphores = provider_limits({**PROVIDER_LIMITS, **(limits or {})})
+    published = _run_batch(publish_queued_article, count, concurrency, wordpress, semaphores)
+    logger.info(f"Publishing finished: {published}/{count} queued articles published, {len(article_queue)} left.")
+    logger.info(f"WordPress request timings: {wordpress.metrics.summary()}")
+    return published
+
+
+def _parse_limit(value: str) -> tuple:
+    provider, _, count = value.partition("=")
+    if provider not in PROVIDER_LIMITS or not count.isdigit():
+        raise argparse.ArgumentTypeError(
+            f"Expected PROVIDER=N with PROVIDER one of: {', '.join(PROVIDER_LIMITS)}"
+        )
+    return provider, int(count)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate and publish AI fairy tale articles.")
+    parser.add_argument(
+        "command", nargs="?", choices=("run", "generate", "publish"), default="run",
+        help="run: generate and publish (default); generate: only fill the article queue; "
+             "publish: only upload queued articles",
+    )
+    parser.add_argument("--count", type=int, default=1, help="number of articles to publish")
+    parser.add_argument("--concurrency", type=int, default=1, help="articles processed in parallel")
+    parser.add_argument(
+        "--limit", type=_parse_limit, action="append", default=[], metavar="PROVIDER=N",
+        help="maximum concurrent calls to a provider (may be repeated)",
+    )
+    parser.add_argument(
+        "--stream-audio", action="store_true",
+        help="upload the audio and encode the video while the speech is still being synthesized",
+    )
+    parser.add_argument(
+        "--validation", choices=VALIDATION_MODES, default="full",
+        help="story validation: a full second pass (default), corrections only, or self-edit during generation",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="finish unfinished jobs from previous runs instead of starting new articles",
+    )
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    post_ai_article()
+    args = parse_args()
+    unfinished_jobs = hold_unfinished_jobs()
+    if args.command == "generate":
+        generate_articles(args.count, args.concurrency, dict(args.limit), validation=args.validation)
+    elif args.command == "publish":
+        publish_queued_articles(args.count, args.concurrency, dict(args.limit))
+    elif args.resume:
+        logger.info(f"Resuming {len(unfinished_jobs)} unfinished jobs.")
+        post_ai_articles(len(unfinished_jobs), args.concurrency, dict(args.limit), jobs=unfinished_jobs,
+                         stream_audio=args.stream_audio, validation=args.validation)
+    else:
+        # A single article goes through the batch path too, so --limit applies to it
+        post_ai_articles(args.count, args.concurrency, dict(args.limit), stream_audio=args.stream_audio,
+                         validation=args.validation)
+    render_pool.shutdown()
+    cleanup_directories()
+    close_clients()
@@ -0,0 +1,343 @@
+"""
+Local stand-ins for every remote provider of the article pipeline (Azure OpenAI chat and
+DALL-E, Google Translate, ElevenLabs, WordPress, YouTube) and for the ffmpeg encode.
+
+Each stand-in waits for a configurable latency, fails with a configurable probability
+and returns a payload of configurable size, so the pipeline can be run and measured
+without network access, API keys or ffmpeg. See benchmark_pipeline.py.
+"""
+import os
+import json
+import time
+import random
+import threading
+import itertools
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from types import SimpleNamespace
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import ai_content_generator
+import elevenlabs_client
+import main
+import render_pool
+from wordpress_client import WordpressClient
+
+STREAM_CHUNKS = 20
+AUDIO_CHUNK_SIZE = 16 * 1024
+
+
+class OfflineProviderError(RuntimeError):
+    """Failure injected by a stand-in."""
+
+
+@dataclass
+class ProviderProfile:
+    """
+    Behaviour of one stand-in. `latency` (seconds) is spread over the chunks of streamed
+    responses; `jitter` adds up to that many seconds at random. The meaning of
+    `payload_bytes` depends on the provider, see DEFAULT_PROFILES.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    failure_rate: float = 0.0
+    payload_bytes: int = 0
+
+
+# Rough production numbers. payload_bytes is: story characters (azure_openai), image size
+# (dalle), audio bytes per 1000 characters of text (elevenlabs) and video bytes per
+# second of audio (ffmpeg); translate, wordpress and youtube ignore it.
+DEFAULT_PROFILES = {
+    "azure_openai": ProviderProfile(latency=20.0, jitter=5.0, payload_bytes=4000),
+    "dalle": ProviderProfile(latency=12.0, jitter=3.0, payload_bytes=1_500_000),
+    "translate": ProviderProfile(latency=0.3, jitter=0.1),
+    "elevenlabs": ProviderProfile(latency=4.0, jitter=1.0, payload_bytes=60_000),
+    "wordpress": ProviderProfile(latency=0.8, jitter=0.4),
+    "youtube": ProviderProfile(latency=10.0, jitter=3.0),
+    "ffmpeg": ProviderProfile(latency=15.0, jitter=2.0, payload_bytes=20_000),
+}
+
+
+class StandIn:
+    """
+    Shared latency and failure behaviour, scaled by `time_scale` (e.g. 0.01 to run a
+    benchmark a hundred times faster than real time).
+    """
+
+    def __init__(self, name: str, profile: ProviderProfile, time_scale: float, rng: random.Random):
+        self.name = name
+        self.profile = profile
+        self.time_scale = time_scale
+        self.calls = 0
+        self.failures = 0
+        self._rng = rng
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        with self._lock:
+            jitter = self._rng.uniform(0, self.profile.jitter) if self.profile.jitter else 0.0
+        return (self.profile.latency + jitter) * self.time_scale
+
+    def call(self, delay: Optional[float] = None) -> None:
+        """Counts a call, waits for its latency and possibly fails it."""
+        with self._lock:
+            self.calls += 1
+            failed = self._rng.random() < self.profile.failure_rate
+            if failed:
+                self.failures += 1
+        time.sleep(self.delay() if delay is None else delay)
+        if failed:
+            raise OfflineProviderError(f"Injected {self.name} failure")
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "failures": self.failures}
+
+
+def sample_story(length: int, number: int = 1) -> str:
+    """
+    An HTML story of at least `length` characters in the format the writer prompt asks for.
+    Different numbers give different texts, so the story, audio and validation caches miss.
+    """
+    sentence = f"Byla jednou jedna malá liška číslo {number}, která se vydala do kouzelného lesa. "
+    paragraphs = []
+    while sum(len(paragraph) for paragraph in paragraphs) < length:
+        paragraphs.append(f"<p>{sentence * 4}</p>")
+    return f"<h2>Offline pohádka {number}</h2>\n" + "\n".join(paragraphs)
+
+
+class OfflineOpenAIClient:
+    """Stands in for AzureOpenAI: chat completions (also streamed) and image generation."""
+
+    def __init__(self, chat: StandIn, images: StandIn):
+        self._chat = chat
+        self._images = images
+        self._numbers = itertools.count(1)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+        self.images = SimpleNamespace(generate=self._generate_image)
+
+    def _create_completion(self, model: str, messages: list, stream: bool = False, **kwargs):
+        system_prompt = messages[0]["content"]
+        if '"corrections"' in system_prompt:
+            text = '{"corrections": []}'
+        else:
+            text = sample_story(self._chat.profile.payload_bytes, next(self._numbers))
+        prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+        if not stream:
+            self._chat.call()
+            usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(text) // 4)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=usage)
+        return self._stream(text)
+
+    def _stream(self, text: str) -> Iterator[SimpleNamespace]:
+        step = max(1, len(text) // STREAM_CHUNKS)
+        delay = self._chat.delay() / STREAM_CHUNKS
+        self._chat.call(delay)
+        for start in range(0, len(text), step):
+            time.sleep(delay)
+            delta = SimpleNamespace(content=text[start:start + step])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    def _generate_image(self, model: str, prompt: str, n: int = 1, **kwargs) -> dict:
+        self._images.call()
+        return {"data": [{"url": f"offline://dalle/{model}.png"}]}
+
+    def close(self) -> None:
+        pass
+
+
+class OfflineRequests:
+    """Stands in for the `requests` module where the DALL-E image is downloaded."""
+
+    def __init__(self, images: StandIn):
+        self._images = images
+
+    def get(self, url: str, **kwargs) -> SimpleNamespace:
+        content = os.urandom(self._images.profile.payload_bytes)
+        return SimpleNamespace(content=content, status_code=200, raise_for_status=lambda: None)
+
+
+def offline_translator_class(translate: StandIn) -> type:
+    class OfflineTranslator:
+        """Stands in for GoogleTranslator; returns the text unchanged."""
+
+        def __init__(self, source: str, target: str):
+            self.source = source
+            self.target = target
+
+        def translate(self, text: str) -> str:
+            translate.call()
+            return text
+
+    return OfflineTranslator
+
+
+class OfflineElevenLabs:
+    """Stands in for the ElevenLabs client; streams random bytes sized by the text length."""
+
+    def __init__(self, tts: StandIn):
+        self._tts = tts
+        self.text_to_speech = SimpleNamespace(convert=self._convert)
+
+    def _convert(self, text: str, **kwargs) -> Iterator[bytes]:
+        size = max(AUDIO_CHUNK_SIZE, self._tts.profile.payload_bytes * len(text) // 1000)
+        chunks = max(1, size // AUDIO_CHUNK_SIZE)
+        delay = self._tts.delay() / (chunks + 1)
+        self._tts.call(delay)
+        for _ in range(chunks):
+            time.sleep(delay)
+            yield os.urandom(AUDIO_CHUNK_SIZE)
+
+
+class OfflineWordpressAdapter(HTTPAdapter):
+    """
+    Stands in for the WordPress server at the transport level. Mounted on the session of
+    a real WordpressClient, so its retries, streamed uploads, attachment cache and
+    request metrics are exercised as in production. Request bodies (bytes, files or
+    chunk iterators) are read to the end; injected failures surface as connection errors.
+    """
+
+    def __init__(self, wordpress: StandIn):
+        super().__init__()
+        self._wordpress = wordpress
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._media: Dict[int, dict] = {}
+
+    @staticmethod
+    def _body_size(body) -> int:
+        if body is None:
+            return 0
+        if isinstance(body, (bytes, bytearray, str)):
+            return len(body)
+        if hasattr(body, "read"):
+            size = 0
+            while True:
+                chunk = body.read(AUDIO_CHUNK_SIZE)
+                if not chunk:
+                    return size
+                size += len(chunk)
+        return sum(len(chunk) for chunk in body)
+
+    def _response(self, request: requests.PreparedRequest, status: int, payload: dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(payload).encode("utf-8")
+        response.headers["Content-Type"] = "application/json"
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        size = self._body_size(request.body)
+        try:
+            self._wordpress.call()
+        except OfflineProviderError as e:
+            raise requests.ConnectionError(str(e), request=request)
+        path = urlparse(request.url).path.split("/wp-json/wp/v2/", 1)[-1]
+        if request.method == "POST" and path == "media":
+            filename = request.headers.get("Content-Disposition", "").rpartition("filename=")[2]
+            with self._lock:
+                media_id = next(self._ids)
+                media = self._media[media_id] = {
+                    "id": media_id,
+                    "source_url": f"https://offline.invalid/media/{media_id}/{filename}",
+                    "mime_type": request.headers.get("Content-Type"),
+                    "media_details": {"filesize": size},
+                }
+            return self._response(request, 201, media)
+        if request.method == "GET" and path.startswith("media/"):
+            with self._lock:
+                media = self._media.get(int(path.split("/")[1]))
+            return self._response(request, 200, media) if media else self._response(request, 404, {})
+        if request.method == "POST" and path == "posts":
+            with self._lock:
+                post_id = next(self._ids)
+            return self._response(request, 201, {"id": post_id, "link": f"https://offline.invalid/?p={post_id}"})
+        return self._response(request, 404, {"code": "rest_no_route"})
+
+
+def offline_wordpress_client(wordpress: StandIn) -> WordpressClient:
+    """A real WordpressClient whose session talks to OfflineWordpressAdapter."""
+    client = WordpressClient()
+    # Never the configured site, even if a request slipped past the adapter
+    client.base_url = "https://offline.invalid"
+    adapter = OfflineWordpressAdapter(wordpress)
+    client.session.mount("https://", adapter)
+    client.session.mount("http://", adapter)
+    return client
+
+
+def _offline_upload_video(youtube: StandIn):
+    ids = itertools.count(1)
+
+    def upload_video_to_youtube(video_path: str, title: str, description: str, tags: list, **kwargs) -> str:
+        youtube.call()
+        return f"offline-{next(ids)}"
+
+    return upload_video_to_youtube
+
+
+def _offline_encoder(ffmpeg: StandIn):
+    def create_video_from_image_and_audio(image_path: str, audio_path: str, output_video_path: str,
+                                          on_progress=None, **kwargs) -> None:
+        ffmpeg.call()
+        # 128 kbit/s MP3, so the audio size gives its duration
+        seconds = os.path.getsize(audio_path) / 16_000
+        with open(output_video_path, "wb") as file:
+            file.write(os.urandom(int(ffmpeg.profile.payload_bytes * seconds)))
+
+    def create_video_from_audio_stream(image_path: str, audio_chunks, output_video_path: str, **kwargs) -> None:
+        audio_size = sum(len(chunk) for chunk in audio_chunks)
+        ffmpeg.call()
+        with open(output_video_path, "wb") as file:
+            file.write(os.urandom(int(ffmpeg.profile.payload_bytes * audio_size / 16_000)))
+
+    return create_video_from_image_and_audio, create_video_from_audio_stream
+
+
+@contextmanager
+def offline_providers(
+    profiles: Optional[Dict[str, ProviderProfile]] = None,
+    time_scale: float = 1.0,
+    seed: Optional[int] = None,
+    real_ffmpeg: bool = False,
+):
+    """
+    Replaces every provider used by main.post_ai_article with a stand-in for the duration
+    of the block and yields (wordpress_client, stand_ins). Pass the WordPress client to
+    post_ai_article; `stand_ins` maps provider names to their StandIn with call counters.
+    Profiles not given fall back to DEFAULT_PROFILES.
+    """
+    profiles = {**DEFAULT_PROFILES, **(profiles or {})}
+    rng = random.Random(seed)
+    stand_ins = {name: StandIn(name, replace(profile), time_scale, rng) for name, profile in profiles.items()}
+    openai_client = OfflineOpenAIClient(stand_ins["azure_openai"], stand_ins["dalle"])
+    encode, encode_stream = _offline_encoder(stand_ins["ffmpeg"])
+
+    patches = [
+        (ai_content_generator, "get_openai_client", lambda *args, **kwargs: openai_client),
+        (ai_content_generator, "requests", OfflineRequests(stand_ins["dalle"])),
+        (ai_content_generator, "GoogleTranslator", offline_translator_class(stand_ins["translate"])),
+        (ai_content_generator, "_translators", {}),
+        (elevenlabs_client, "client", OfflineElevenLabs(stand_ins["elevenlabs"])),
+        (main, "upload_video_to_youtube", _offline_upload_video(stand_ins["youtube"])),
+    ]
+    if not real_ffmpeg:
+        patches += [
+            (render_pool, "create_video_from_image_and_audio", encode),
+            (render_pool, "create_video_from_audio_stream", encode_stream),
+        ]
+    originals = [(target, name, getattr(target, name)) for target, name, _ in patches]
+    for target, name, value in patches:
+        setattr(target, name, value)
+    try:
+        yield offline_wordpress_client(stand_ins["wordpress"]), stand_ins
+    finally:
+        for target, name, value in originals:
+            setattr(target, name, value)
@@ -0,0 +1,197 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from logger import logger
+
+
+class PipelineError(RuntimeError):
+    """
+    Raised when a required stage fails. The original exception is kept in `error`.
+    """
+
+    def __init__(self, stage: str, error: BaseException, values: Optional[Dict[str, Any]] = None):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+        self.values = values or {}
+
+
+@dataclass
+class Stage:
+    """
+    One step of a pipeline.
+
+    `func` is called with keyword arguments named after `inputs` and its return value
+    is mapped onto `outputs` (a single value for one output, a tuple for several).
+    When an optional stage fails its outputs are set to None instead of aborting the run.
+    `provider` names the remote service the stage talks to, used for concurrency limits.
+    Values listed in `emits` are published before the stage finishes: the stage receives an
+    `emit(**values)` callable and downstream stages start as soon as it is called.
+    """
+
+    name: str
+    func: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    optional: bool = False
+    provider: Optional[str] = None
+    emits: Tuple[str, ...] = ()
+
+    def unpack(self, result: Any) -> Dict[str, Any]:
+        if not self.outputs:
+            return {}
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        if result is None or len(result) != len(self.outputs):
+            raise ValueError(f"Stage '{self.name}' must return {len(self.outputs)} values.")
+        return dict(zip(self.outputs, result))
+
+
+@dataclass
+class PipelineResult:
+    values: Dict[str, Any]
+    timings: Dict[str, float] = field(default_factory=dict)
+    failed: Dict[str, BaseException] = field(default_factory=dict)
+    wall_time: float = 0.0
+
+
+def provider_limits(limits: Dict[str, int]) -> Dict[str, threading.BoundedSemaphore]:
+    """
+    Builds the semaphores that cap concurrent calls per provider.
+    Share the returned mapping between pipelines to apply the limits across a whole batch.
+    """
+    return {provider: threading.BoundedSemaphore(max(1, count)) for provider, count in limits.items()}
+
+
+def _validate(stages: Iterable[Stage], available: Iterable[str]) -> None:
+    """
+    Checks that stage names and outputs are unique and that every input has a producer.
+    """
+    names = set()
+    produced = set()
+    for stage in stages:
+        if stage.name in names:
+            raise ValueError(f"Duplicate stage name: {stage.name}")
+        names.add(stage.name)
+        for output in stage.outputs + stage.emits:
+            if output in produced:
+                raise ValueError(f"Value '{output}' is produced more than once.")
+            produced.add(output)
+    produced.update(available)
+    for stage in stages:
+        missing = [name for name in stage.inputs if name not in produced]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' has no producer for: {', '.join(missing)}")
+
+
+def run_pipeline(
+    stages: Iterable[Stage],
+    initial: Optional[Dict[str, Any]] = None,
+    max_workers: int = 4,
+    limits: Optional[Dict[str, threading.BoundedSemaphore]] = None,
+    on_values: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> PipelineResult:
+    """
+    Runs the stages as a dependency graph on a thread pool.
+
+    A stage starts as soon as all of its inputs are available, so independent stages
+    overlap. If a required stage fails, no new stages are started, the running ones are
+    allowed to finish and PipelineError is raised.
+    Stages with a `provider` listed in `limits` hold that provider's semaphore while running.
+    Stages whose outputs are all present in `initial` are skipped, which lets a run resume
+    from a checkpoint. `on_values(stage_name, values)` is called with every successfully
+    produced (or emitted) set of values, e.g. to persist progress.
+    """
+    stages = list(stages)
+    values: Dict[str, Any] = dict(initial or {})
+    _validate(stages, values)
+
+    result = PipelineResult(values=values)
+    pending = {}
+    for stage in stages:
+        produces = stage.outputs + stage.emits
+        if produces and all(name in values for name in produces):
+            logger.info(f"Skipping stage '{stage.name}', its outputs are already available")
+        else:
+            pending[stage.name] = stage
+    events: "queue.Queue[Tuple[str, Stage, float, Any, Optional[BaseException]]]" = queue.Queue()
+    running = 0
+    failure: Optional[PipelineError] = None
+    started_at = time.perf_counter()
+
+    limits = limits or {}
+
+    def execute(stage: Stage, kwargs: Dict[str, Any]) -> None:
+        semaphore = limits.get(stage.provider) if stage.provider else None
+        if semaphore is not None:
+            semaphore.acquire()
+        stage_start = time.perf_counter()
+        if stage.emits:
+            def emit(**early_values: Any) -> None:
+                unknown = set(early_values) - set(stage.emits)
+                if unknown:
+                    raise ValueError(f"Stage '{stage.name}' cannot emit: {', '.join(unknown)}")
+                events.put(("emit", stage, time.perf_counter() - stage_start, early_values, None))
+            kwargs = {**kwargs, "emit": emit}
+        try:
+            outcome = stage.func(**kwargs)
+            events.put(("done", stage, time.perf_counter() - stage_start, outcome, None))
+        except BaseException as e:
+            events.put(("done", stage, time.perf_counter() - stage_start, None, e))
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as pool:
+        while True:
+            if failure is None:
+                ready = [
+                    stage for stage in pending.values()
+                    if all(name in values for name in stage.inputs)
+                ]
+                for stage in ready:
+                    del pending[stage.name]
+                    logger.debug(f"Starting stage '{stage.name}'")
+                    pool.submit(execute, stage, {name: values[name] for name in stage.inputs})
+                    running += 1
+            if running == 0:
+                break
+
+            kind, stage, duration, outcome, error = events.get()
+            if kind == "emit":
+                values.update(outcome)
+                logger.info(f"Stage '{stage.name}' emitted {', '.join(outcome)} after {duration:.2f}s")
+                if on_values:
+                    on_values(stage.name, outcome)
+                continue
+            running -= 1
+            result.timings[stage.name] = duration
+            if error is None:
+                try:
+                    produced = stage.unpack(outcome)
+                    values.update(produced)
+                    logger.info(f"Stage '{stage.name}' finished in {duration:.2f}s")
+                    if on_values:
+                        on_values(stage.name, produced)
+                    continue
+                except Exception as e:
+                    error = e
+            result.failed[stage.name] = error
+            if stage.optional:
+                logger.error(f"Optional stage '{stage.name}' failed after {duration:.2f}s: {error}")
+                values.update({name: None for name in stage.outputs + stage.emits if name not in values})
+            else:
+                logger.error(f"Stage '{stage.name}' failed after {duration:.2f}s: {error}")
+                if failure is None:
+                    failure = PipelineError(stage.name, error, values)
+
+    result.wall_time = time.perf_counter() - started_at
+    if failure is not None:
+        raise failure
+    if pending:
+        raise RuntimeError(f"Pipeline stalled, unresolved stages: {', '.join(pending)}")
+    logger.info(f"Pipeline finished in {result.wall_time:.2f}s")
+    return result
@@ -0,0 +1,117 @@
+import os
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from logger import logger
+from youtube_uploader import create_video_from_audio_stream, create_video_from_image_and_audio
+
+
+@dataclass
+class RenderResult:
+    output_video_path: str
+    wall_time: float
+    encoded_seconds: float
+    speed: Optional[str]
+
+
+class RenderPool:
+    """
+    Bounded pool of concurrent ffmpeg encodes.
+
+    At most `max_jobs` videos are encoded at once and each ffmpeg process is capped at
+    `threads_per_job` threads, so a batch run keeps every core busy without the encodes
+    fighting over them. Jobs are queued with submit(), which returns a Future, while the
+    rest of the pipeline carries on. ffmpeg's progress output is logged every
+    `log_interval` seconds and summarised in the RenderResult.
+    """
+
+    def __init__(self, max_jobs: int = None, threads_per_job: int = None, log_interval: float = 15.0):
+        cpu_count = os.cpu_count() or 1
+        self.max_jobs = max_jobs or max(1, cpu_count // 2)
+        self.threads_per_job = threads_per_job or max(1, cpu_count // self.max_jobs)
+        self.log_interval = log_interval
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="render")
+            return self._executor
+
+    def _render(self, image_path: str, audio_path: str, output_video_path: str) -> RenderResult:
+        name = os.path.basename(output_video_path)
+        start = time.perf_counter()
+        last_report = {"out_time_us": "0", "speed": None}
+        next_log = start + self.log_interval
+
+        def on_progress(block: Dict[str, str]) -> None:
+            nonlocal next_log
+            last_report.update(block)
+            now = time.perf_counter()
+            if now >= next_log:
+                next_log = now + self.log_interval
+                logger.info(f"Rendering {name}: {_encoded_seconds(last_report):.0f} s encoded, "
+                            f"speed {last_report.get('speed')}")
+
+        create_video_from_image_and_audio(
+            image_path, audio_path, output_video_path,
+            threads=self.threads_per_job, on_progress=on_progress,
+        )
+        result = RenderResult(
+            output_video_path=output_video_path,
+            wall_time=time.perf_counter() - start,
+            encoded_seconds=_encoded_seconds(last_report),
+            speed=last_report.get("speed"),
+        )
+        logger.info(f"Rendered {name}: {result.encoded_seconds:.0f} s of video in {result.wall_time:.1f} s "
+                    f"(speed {result.speed})")
+        return result
+
+    def submit(self, image_path: str, audio_path: str, output_video_path: str) -> Future:
+        """
+        Queues an encode and returns a Future resolving to its RenderResult.
+        """
+        return self._pool().submit(self._render, image_path, audio_path, output_video_path)
+
+    def render(self, image_path: str, audio_path: str, output_video_path: str) -> RenderResult:
+        """
+        Encodes a video through the pool and waits for it.
+        """
+        return self.submit(image_path, audio_path, output_video_path).result()
+
+    def render_stream(self, image_path: str, audio_chunks: Iterable[bytes], output_video_path: str) -> RenderResult:
+        """
+        Encodes a video from audio that is still being streamed. The encode runs in the
+        calling thread, since it has to keep up with the stream rather than wait for a
+        free worker, but is capped to the same number of threads as pooled encodes.
+        The caller holds the encode slot, i.e. the "ffmpeg" provider limit.
+        """
+        start = time.perf_counter()
+        create_video_from_audio_stream(image_path, audio_chunks, output_video_path, threads=self.threads_per_job)
+        result = RenderResult(
+            output_video_path=output_video_path,
+            wall_time=time.perf_counter() - start,
+            encoded_seconds=0.0,
+            speed=None,
+        )
+        logger.info(f"Rendered {os.path.basename(output_video_path)} from the audio stream in {result.wall_time:.1f} s")
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+def _encoded_seconds(report: Dict[str, str]) -> float:
+    # Older ffmpeg builds only report out_time_ms, which is in microseconds as well
+    value = report.get("out_time_us") or report.get("out_time_ms") or "0"
+    try:
+        return int(value) / 1_000_000
+    except ValueError:
+        return 0.0
@@ -0,0 +1,80 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from logger import logger
+
+
+class TranslationCache:
+    """
+    Disk-backed LRU cache of translations keyed by source language, target language and text.
+
+    Entries are kept in memory in least-recently-used order and written to a JSON file
+    after every change (atomically, via a temporary file). Hit and miss counters are
+    available through stats().
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._load()
+
+    @staticmethod
+    def _key(source_lang: str, target_lang: str, text: str) -> str:
+        return f"{source_lang}\t{target_lang}\t{text}"
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                self._entries = OrderedDict(json.load(file))
+        except (json.JSONDecodeError, TypeError, ValueError):
+            logger.error(f"Error reading translation cache {self.path}, starting empty.")
+            self._entries = OrderedDict()
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(list(self._entries.items()), file, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def get(self, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        key = self._key(source_lang, target_lang, text)
+        with self._lock:
+            translated = self._entries.get(key)
+            if translated is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return translated
+
+    def put_many(self, source_lang: str, target_lang: str, translations: Dict[str, str]) -> None:
+        """
+        Stores several translations and persists the cache once.
+        """
+        if not translations:
+            return
+        with self._lock:
+            for text, translated in translations.items():
+                key = self._key(source_lang, target_lang, text)
+                self._entries[key] = translated
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Could not write translation cache {self.path}: {e}")
+
+    def put(self, source_lang: str, target_lang: str, text: str, translated: str) -> None:
+        self.put_many(source_lang, target_lang, {text: translated})
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
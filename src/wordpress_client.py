@@ -1,99 +1,228 @@
+import os
 import base64
+import random
+import threading
+import mimetypes
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Union
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from config import WORDPRESS_BASE_URL, WORDPRESS_USERNAME, WORDPRESS_APPLICATION_PASSWORD
+from helper import combine_content
 from logger import logger
 
-def retry_request(request_func, retries=3, delay=2, **kwargs):
+# Statusy, u kterých má smysl požadavek opakovat
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Metody, jejichž opakování může na serveru vytvořit duplikát
+NON_IDEMPOTENT_METHODS = ('POST', 'PATCH')
+# (connect, read) timeout v sekundách
+REQUEST_TIMEOUT = (10, 300)
+# Výchozí kategorie pro AI generované příspěvky
+AIGENERATED_CATEGORY_ID = 17
+
+
+class RequestMetrics:
+    """Počítadla doby trvání HTTP požadavků podle operace."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, operation: str, elapsed: float, status: Optional[int]) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(operation, {"count": 0, "errors": 0, "total": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+            if status is None or status >= 400:
+                stats["errors"] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                operation: {**stats, "avg": stats["total"] / stats["count"]}
+                for operation, stats in self._stats.items()
+            }
+
+
+@dataclass
+class MediaItem:
+    """Nahraný soubor v WordPress media library."""
+
+    id: int
+    source_url: Optional[str] = None
+    mime_type: Optional[str] = None
+    size: Optional[int] = None
+
+    @classmethod
+    def from_response(cls, data: dict) -> "MediaItem":
+        """Sestaví položku z odpovědi na POST/GET /media."""
+        details = data.get('media_details') or {}
+        return cls(
+            id=data.get('id'),
+            source_url=data.get('source_url'),
+            mime_type=data.get('mime_type'),
+            size=details.get('filesize'),
+        )
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Vrátí počet sekund z hlavičky Retry-After (číslo nebo HTTP datum), pokud je uvedena."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_request(request_func, retries=3, delay=2, max_delay=30, metrics=None, operation=None, **kwargs):
     """
     Generic retry function for HTTP requests.
     
     Tries to execute 'request_func' with the given keyword arguments.
-    Accepts response status codes 200 and 201 as success, jinak čeká 'delay' sekund a opakuje.
+    Accepts response status codes 200 and 201 as success. Síťové chyby a statusy 429/5xx se
+    opakují s exponenciálním čekáním s náhodným rozptylem (nebo podle Retry-After),
+    ostatní odpovědi se vrací hned volajícímu.
+    Souborové tělo požadavku (`data` s metodou seek) se před každým pokusem přetočí na začátek.
+    U neidempotentních metod (POST) se opakují jen chyby spojení, ne vypršení čtení odpovědi:
+    server mohl požadavek už zpracovat a opakování by vytvořilo duplicitní příspěvek nebo soubor.
     """
+    operation = operation or f"{kwargs.get('method', 'REQUEST')} {kwargs.get('url', '')}"
+    idempotent = str(kwargs.get('method', 'GET')).upper() not in NON_IDEMPOTENT_METHODS
     for attempt in range(1, retries + 1):
-        response = request_func(**kwargs)
-        if response.status_code in (200, 201):
-            return response
-        logger.error(f"Attempt {attempt}: Request failed with status code: {response.status_code}")
-        time.sleep(delay)
+        if hasattr(kwargs.get('data'), 'seek'):
+            kwargs['data'].seek(0)
+        start = time.perf_counter()
+        try:
+            response = request_func(**kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if metrics:
+                metrics.record(operation, time.perf_counter() - start, None)
+            logger.error(f"Attempt {attempt}: {operation} failed: {e}")
+            # ConnectTimeout je podtřídou ConnectionError, ReadTimeout ne
+            if not idempotent and not isinstance(e, requests.ConnectionError):
+                raise
+            wait = None
+        else:
+            if metrics:
+                metrics.record(operation, time.perf_counter() - start, response.status_code)
+            if response.status_code in (200, 201) or response.status_code not in RETRY_STATUS_CODES:
+                return response
+            logger.error(f"Attempt {attempt}: Request failed with status code: {response.status_code}")
+            wait = _retry_after(response)
+        if attempt < retries:
+            if wait is None:
+                wait = random.uniform(0, min(max_delay, delay * 2 ** (attempt - 1)))
+            time.sleep(min(wait, max_delay))
     raise RuntimeError(f"Operation failed after {retries} retries.")
 
 class WordpressClient:
     """Synchronní komunikace s WordPress pomocí REST API."""
 
-    def __init__(self):
+    def __init__(self, pool_size: int = 16):
         self.base_url = WORDPRESS_BASE_URL
         self.auth = HTTPBasicAuth(WORDPRESS_USERNAME, WORDPRESS_APPLICATION_PASSWORD)
+        self.timeout = REQUEST_TIMEOUT
+        self.metrics = RequestMetrics()
+        # Nahrané soubory podle attachment ID, aby nebylo nutné jejich URL znovu načítat
+        self._media_cache: Dict[int, MediaItem] = {}
+        self._media_cache_lock = threading.Lock()
+        # Sdílená session drží spojení otevřená (keep-alive) mezi požadavky i vlákny
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
-    def upload_image(self, base64_image: str, filename: str) -> int:
+    def _request(self, method: str, path: str, operation: str, retries: int = 3, **kwargs) -> requests.Response:
+        """Provede požadavek přes sdílenou session s opakováním a měřením času."""
+        return retry_request(
+            self.session.request,
+            retries=retries,
+            delay=2,
+            metrics=self.metrics,
+            operation=operation,
+            method=method,
+            url=f"{self.base_url}/wp-json/wp/v2/{path}",
+            timeout=self.timeout,
+            **kwargs
+        )
+
+    def upload_media(self, data, filename: str, content_type: str, retries: int = 3) -> MediaItem:
         """
-        Nahraje obrázek do WordPress media library a vrátí attachment ID.
+        Nahraje soubor do WordPress media library a vrátí MediaItem sestavený z odpovědi
+        (ID, source_url, MIME typ, velikost), který se zároveň uloží do cache.
+        `data` jsou bajty, otevřený binární soubor, který se odesílá přímo z disku,
+        nebo iterátor bloků (odešle se jako chunked a jen jedním pokusem, proud nelze opakovat).
         """
-        url = f"{self.base_url}/wp-json/wp/v2/media"
-        image_data = base64.b64decode(base64_image)
         headers = {
             'Content-Disposition': f'attachment; filename={filename}',
-            'Content-Type': 'image/jpeg'
+            'Content-Type': content_type
         }
-        response = retry_request(
-            requests.post,
-            retries=3,
-            delay=2,
-            url=url,
-            auth=self.auth,
-            headers=headers,
-            data=image_data
-        )
+        if not isinstance(data, (bytes, bytearray)) and not hasattr(data, 'seek'):
+            retries = 1
+        response = self._request('POST', 'media', 'POST /media', retries=retries, headers=headers, data=data)
         if response.status_code == 201:
-            attachment_id = response.json().get('id')
-            logger.info(f"Obrázek nahrán, ID: {attachment_id}")
-            return attachment_id
+            media = MediaItem.from_response(response.json())
+            with self._media_cache_lock:
+                self._media_cache[media.id] = media
+            logger.info(f"Soubor {filename} nahrán, ID: {media.id}, URL: {media.source_url}")
+            return media
         else:
-            logger.error(f"Nahrání obrázku selhalo: {response.status_code}")
+            logger.error(f"Nahrání souboru {filename} selhalo: {response.status_code}")
             logger.error(response.text)
-            raise RuntimeError(f"Image upload failed with status code: {response.status_code}")
+            raise RuntimeError(f"Media upload failed with status code: {response.status_code}")
+
+    def upload_file(self, file_path: str, filename: str = None, content_type: str = None) -> MediaItem:
+        """
+        Nahraje soubor z disku bez načtení do paměti a bez base64 a vrátí MediaItem.
+        Název a MIME typ se odvodí z cesty, pokud nejsou zadány.
+        """
+        filename = filename or os.path.basename(file_path)
+        content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        with open(file_path, 'rb') as file:
+            return self.upload_media(file, filename, content_type)
+
+    def upload_image(self, base64_image: str, filename: str) -> int:
+        """
+        Nahraje obrázek do WordPress media library a vrátí attachment ID.
+        Zachováno kvůli kompatibilitě, nový kód má používat upload_file().
+        """
+        return self.upload_media(base64.b64decode(base64_image), filename, 'image/jpeg').id
 
     def upload_audio(self, base64_audio: str, filename: str) -> int:
         """
         Nahraje audio soubor do WordPress media library a vrátí attachment ID.
+        Zachováno kvůli kompatibilitě, nový kód má používat upload_file().
         """
-        url = f"{self.base_url}/wp-json/wp/v2/media"
-        audio_data = base64.b64decode(base64_audio)
-        headers = {
-            'Content-Disposition': f'attachment; filename={filename}',
-            'Content-Type': 'audio/mpeg'
-        }
-        response = retry_request(
-            requests.post,
-            retries=3,
-            delay=2,
-            url=url,
-            auth=self.auth,
-            headers=headers,
-            data=audio_data
-        )
-        if response.status_code == 201:
-            attachment_id = response.json().get('id')
-            logger.info(f"Audio nahráno, ID: {attachment_id}")
-            return attachment_id
-        else:
-            logger.error(f"Nahrání audia selhalo: {response.status_code}")
-            logger.error(response.text)
-            raise RuntimeError(f"Audio upload failed with status code: {response.status_code}")
+        return self.upload_media(base64.b64decode(base64_audio), filename, 'audio/mpeg').id
 
     def get_media_url(self, attachment_id: int, retries: int = 3, delay: int = 2) -> str:
         """
         Attempts to retrieve the media URL with a simple retry mechanism.
+        Media uploaded by this client are answered from the attachment cache without a request.
+        Network errors and 429/5xx responses are retried by the shared session first.
         """
-        url = f"{self.base_url}/wp-json/wp/v2/media/{attachment_id}"
+        with self._media_cache_lock:
+            cached = self._media_cache.get(attachment_id)
+        if cached and cached.source_url:
+            return cached.source_url
         for attempt in range(1, retries + 1):
-            response = requests.get(url, auth=self.auth)
+            response = self._request('GET', f'media/{attachment_id}', 'GET /media/{id}')
             if response.status_code == 200:
-                media_url = response.json().get('source_url')
-                if media_url:
-                    return media_url
+                media = MediaItem.from_response(response.json())
+                if media.source_url:
+                    with self._media_cache_lock:
+                        self._media_cache[attachment_id] = media
+                    return media.source_url
             else:
                 logger.error(
                     f"Attempt {attempt}: Failed to retrieve media URL for attachment {attachment_id}: {response.status_code}"
@@ -101,96 +230,86 @@ class WordpressClient:
             time.sleep(delay)
         raise RuntimeError(f"Failed to retrieve media URL for attachment {attachment_id} after {retries} attempts")
 
-    def create_post(self, title: str, content: str):
+    def _resolve_media(self, media: Union[str, int, MediaItem], content_type: str) -> MediaItem:
+        """Nahraje soubor zadaný cestou, nebo vrátí už nahraný soubor podle ID."""
+        if isinstance(media, MediaItem):
+            return media
+        if isinstance(media, int):
+            with self._media_cache_lock:
+                cached = self._media_cache.get(media)
+            return cached or MediaItem(id=media)
+        return self.upload_file(media, content_type=content_type)
+
+    def publish_post(
+        self,
+        title: str,
+        content: str,
+        categories: Optional[list] = None,
+        featured_image: Union[str, int, MediaItem, None] = None,
+        audio: Union[str, int, MediaItem, None] = None,
+        status: str = "publish",
+    ) -> dict:
         """
-        Vytvoří nový příspěvek na WordPressu.
+        Publikuje příspěvek jedním POST /posts požadavkem přes sdílenou session s opakováním.
+
+        `featured_image` a `audio` mohou být cesta k souboru (nahraje se, obě nahrávání běží
+        souběžně), attachment ID nebo MediaItem. Audio se vloží na začátek obsahu jako
+        [audio] přehrávač.
         """
-        url = f"{self.base_url}/wp-json/wp/v2/posts"
-        aigenerated_category_id = 17  # Nastav si podle svých potřeb
+        uploads = {
+            name: (media, content_type)
+            for name, media, content_type in (
+                ("image", featured_image, "image/png"),
+                ("audio", audio, "audio/mpeg"),
+            )
+            if media is not None
+        }
+        resolved: Dict[str, MediaItem]
+        if len(uploads) > 1:
+            with ThreadPoolExecutor(max_workers=len(uploads)) as pool:
+                futures = {name: pool.submit(self._resolve_media, *args) for name, args in uploads.items()}
+                resolved = {name: future.result() for name, future in futures.items()}
+        else:
+            resolved = {name: self._resolve_media(*args) for name, args in uploads.items()}
+
+        if "audio" in resolved:
+            audio_url = self.get_media_url(resolved["audio"].id)
+            content = combine_content(content, f'[audio src="{audio_url}"]')
         data = {
             "title": title,
             "content": content,
-            "status": "publish",
-            "categories": [aigenerated_category_id]
+            "status": status,
+            "categories": categories if categories is not None else [AIGENERATED_CATEGORY_ID]
         }
-        response = retry_request(
-            requests.post,
-            retries=3,
-            delay=2,
-            url=url,
-            auth=self.auth,
-            json=data
-        )
+        if "image" in resolved:
+            data["featured_media"] = resolved["image"].id
+        response = self._request('POST', 'posts', 'POST /posts', json=data)
         if response.status_code == 201:
-            logger.info("Příspěvek vytvořen.")
+            logger.info(f"Příspěvek vytvořen: {title}")
             return response.json()
         else:
             logger.error(f"Chyba při vytváření příspěvku: {response.status_code}")
-            logger.error(response.json())
+            logger.error(response.text)
             raise RuntimeError(f"Post creation failed with status code: {response.status_code}")
 
+    def create_post(self, title: str, content: str):
+        """
+        Vytvoří nový příspěvek na WordPressu.
+        """
+        return self.publish_post(title, content)
+
     def create_post_with_image(self, title: str, content: str, base64_image: str, filename: str):
         """
         Vytvoří příspěvek s obrázkem – nejprve nahraje obrázek a poté ho připojí.
         """
         attachment_id = self.upload_image(base64_image, filename)
-        url = f"{self.base_url}/wp-json/wp/v2/posts"
-        aigenerated_category_id = 17
-        data = {
-            "title": title,
-            "content": content,
-            "status": "publish",
-            "categories": [aigenerated_category_id],
-            "featured_media": attachment_id
-        }
-        response = retry_request(
-            requests.post,
-            retries=3,
-            delay=2,
-            url=url,
-            auth=self.auth,
-            json=data
-        )
-        if response.status_code == 201:
-            logger.info("Příspěvek s obrázkem vytvořen.")
-            return response.json()
-        else:
-            logger.error(f"Chyba při vytváření příspěvku s obrázkem: {response.status_code}")
-            logger.error(response.json())
-            raise RuntimeError(f"Post creation with image failed with status code: {response.status_code}")
+        return self.publish_post(title, content, featured_image=attachment_id)
 
     def create_post_with_audio(self, title: str, content: str, base64_audio: str, filename: str):
         """
         Vytvoří příspěvek s audio přehrávačem – audio se nejprve nahraje, pak se jeho URL vloží do HTML.
         """
-        # Nahraj audio
         attachment_id = self.upload_audio(base64_audio, filename)
-        # Získej URL nahraného audia
         media_url = self.get_media_url(attachment_id)
-        # Vytvoř HTML audio přehrávač
         audio_html = f'<audio controls src="{media_url}"></audio>'
-        # Připoj audio přehrávač k obsahu
-        new_content = content + "\n" + audio_html
-        url = f"{self.base_url}/wp-json/wp/v2/posts"
-        aigenerated_category_id = 17
-        data = {
-            "title": title,
-            "content": new_content,
-            "status": "publish",
-            "categories": [aigenerated_category_id]
-        }
-        response = retry_request(
-            requests.post,
-            retries=3,
-            delay=2,
-            url=url,
-            auth=self.auth,
-            json=data
-        )
-        if response.status_code == 201:
-            logger.info("Příspěvek s audiem vytvořen.")
-            return response.json()
-        else:
-            logger.error(f"Chyba při vytváření příspěvku s audiem: {response.status_code}")
-            logger.error(response.json())
-            raise RuntimeError(f"Post creation with audio failed with status code: {response.status_code}")
+        return self.publish_post(title, content + "\n" + audio_html)
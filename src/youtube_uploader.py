@@ -1,79 +1,341 @@
 import os
+import json
+import time
+import random
+import hashlib
 import logging
 import subprocess
 import pickle
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
 
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload, build_http
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
 logger = logging.getLogger(__name__)
 
-def create_video_from_image_and_audio(image_path: str, audio_path: str, output_video_path: str) -> None:
+# Determine the directory of the current script to ensure correct file paths when running from cron.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# OAuth2 configuration with absolute paths
+CLIENT_SECRETS_FILE = os.path.join(BASE_DIR, "client_secrets.json")
+CREDENTIALS_PICKLE_FILE = os.path.join(BASE_DIR, "youtube_credentials.pickle")
+SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
+
+# Access tokens are refreshed this long before they expire
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Resumable upload settings; the chunk size has to be a multiple of 256 KiB
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_RETRIES = 8
+UPLOAD_RETRY_DELAY = 1
+UPLOAD_MAX_RETRY_DELAY = 60
+UPLOAD_SESSIONS_DIR = os.path.join(BASE_DIR, "youtube_uploads")
+RETRIABLE_STATUS_CODES = {500, 502, 503, 504}
+RETRIABLE_EXCEPTIONS = (httplib2.HttpLib2Error, ConnectionError, TimeoutError)
+# Returned for an upload session that has expired or does not exist anymore
+EXPIRED_SESSION_STATUS_CODES = {404, 410}
+
+
+class YouTubeSession:
     """
-    Creates a video by combining a static image with an audio file using ffmpeg.
-    
-    The image will be displayed throughout the video while the audio plays in the background.
-    The output video is forced to a resolution of 1920x1080 to ensure it is uploaded as a normal video.
+    Credentials and API client shared by all uploads of a process.
+
+    The pickled credentials are loaded once and refreshed (and re-saved) shortly before
+    the access token expires, instead of on every upload. The API client is built once,
+    from the discovery document bundled with google-api-python-client without fetching or
+    caching it. Its httplib2 connection is not thread-safe, so every upload executes its
+    requests through its own transport from http().
+    """
+
+    def __init__(self, credentials_file: str = CREDENTIALS_PICKLE_FILE, client_secrets_file: str = CLIENT_SECRETS_FILE):
+        self.credentials_file = credentials_file
+        self.client_secrets_file = client_secrets_file
+        self._creds = None
+        self._lock = threading.Lock()
+        self._youtube = None
+        self._youtube_creds = None
+
+    def _save(self) -> None:
+        with open(self.credentials_file, "wb") as token:
+            pickle.dump(self._creds, token)
+
+    def _needs_refresh(self) -> bool:
+        if not self._creds.valid:
+            return True
+        # google-auth stores the expiry as a naive UTC datetime
+        expiry = getattr(self._creds, "expiry", None)
+        return expiry is not None and expiry - TOKEN_REFRESH_MARGIN <= datetime.utcnow()
+
+    def credentials(self):
+        """
+        Returns valid credentials, loading, refreshing or authorizing them as needed.
+        """
+        with self._lock:
+            if self._creds is None and os.path.exists(self.credentials_file):
+                with open(self.credentials_file, "rb") as token:
+                    self._creds = pickle.load(token)
+            if self._creds is not None and not self._needs_refresh():
+                return self._creds
+            if self._creds and self._creds.refresh_token:
+                self._creds.refresh(Request())
+                logger.info("YouTube access token refreshed.")
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(self.client_secrets_file, SCOPES)
+                self._creds = flow.run_local_server(port=0)
+            self._save()
+            return self._creds
+
+    def service(self):
+        """
+        Returns the YouTube API client with freshly checked credentials. Use it to build
+        requests and execute them with a transport from http().
+        """
+        creds = self.credentials()
+        with self._lock:
+            # Rebuilt only if a new authorization replaced the credentials
+            if self._youtube is None or self._youtube_creds is not creds:
+                self._youtube = build("youtube", "v3", credentials=creds, static_discovery=True, cache_discovery=False)
+                self._youtube_creds = creds
+            return self._youtube
+
+    def http(self) -> AuthorizedHttp:
+        """
+        Returns a new authorized transport for the requests of one upload.
+        build_http() sets a socket timeout and keeps httplib2 from following YouTube's
+        "308 Resume Incomplete" answers to chunks as redirects.
+        """
+        return AuthorizedHttp(self.credentials(), http=build_http())
+
+
+youtube_session = YouTubeSession()
+
+# Encoding profiles: "legacy" is the original command, "still" is tuned for a static image
+VIDEO_PROFILE = "still"
+VIDEO_SIZE = (1920, 1080)  # Force 16:9 resolution to avoid YouTube Shorts classification
+VIDEO_PRESET = "veryfast"
+VIDEO_FRAME_RATE = 1
+VIDEO_THREADS = None  # None lets ffmpeg decide
+VIDEO_AUDIO_CODEC = "copy"  # MP3 is muxed into the MP4 as is; use "aac" to re-encode
+
+
+def prescale_image(image_path: str, size: tuple = VIDEO_SIZE) -> str:
+    """
+    Scales the image to the video resolution once, so ffmpeg does not have to scale
+    every frame. Returns the path of the scaled copy next to the original.
     """
+    width, height = size
+    root, _ = os.path.splitext(image_path)
+    scaled_path = f"{root}.{width}x{height}.png"
     command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-i", image_path,
+        "-vf", f"scale={width}:{height}",
+        "-frames:v", "1",
+        scaled_path,
+    ]
+    subprocess.run(command, check=True)
+    return scaled_path
+
+
+def _video_command(
+    image_path: str,
+    audio_input: str,
+    output_video_path: str,
+    audio_format: str = None,
+    profile: str = VIDEO_PROFILE,
+    preset: str = VIDEO_PRESET,
+    threads: int = VIDEO_THREADS,
+    audio_codec: str = VIDEO_AUDIO_CODEC,
+    prescaled: bool = False,
+) -> list:
+    """
+    Builds the ffmpeg command that loops a still image over an audio input.
+
+    The "still" profile feeds the image at VIDEO_FRAME_RATE (1 fps by default) instead of
+    25 fps, uses an x264 speed preset and can copy the MP3 audio instead of re-encoding it.
+    `prescaled` skips the scale filter for an image already at VIDEO_SIZE.
+    """
+    audio_args = ["-f", audio_format] if audio_format else []
+    width, height = VIDEO_SIZE
+    if profile == "legacy":
+        return [
+            "ffmpeg", "-y",
+            "-loop", "1",
+            "-i", image_path,
+            *audio_args,
+            "-i", audio_input,
+            "-vf", f"scale={width}:{height}",
+            "-c:v", "libx264",
+            "-tune", "stillimage",
+            "-c:a", "aac",
+            "-b:a", "192k",
+            "-pix_fmt", "yuv420p",
+            "-shortest",
+            output_video_path
+        ]
+    if profile != "still":
+        raise ValueError(f"Unknown video profile: {profile}")
+
+    video_filter = "format=yuv420p" if prescaled else f"scale={width}:{height},format=yuv420p"
+    audio_codec_args = ["-c:a", "copy"] if audio_codec == "copy" else ["-c:a", audio_codec, "-b:a", "192k"]
+    thread_args = ["-threads", str(threads)] if threads else []
+    return [
         "ffmpeg", "-y",
         "-loop", "1",
+        "-framerate", str(VIDEO_FRAME_RATE),
         "-i", image_path,
-        "-i", audio_path,
-        "-vf", "scale=1920:1080",  # Force 16:9 resolution to avoid YouTube Shorts classification
+        *audio_args,
+        "-i", audio_input,
+        "-map", "0:v", "-map", "1:a",
+        "-vf", video_filter,
+        "-r", str(VIDEO_FRAME_RATE),
         "-c:v", "libx264",
+        "-preset", preset,
         "-tune", "stillimage",
-        "-c:a", "aac",
-        "-b:a", "192k",
-        "-pix_fmt", "yuv420p",
+        *thread_args,
+        *audio_codec_args,
         "-shortest",
         output_video_path
     ]
+
+
+def _run_with_prescaled_image(image_path: str, profile: str, build_command, run) -> None:
+    """
+    Runs the encode on a pre-scaled copy of the image for the "still" profile, falling
+    back to the scale filter if the image cannot be pre-scaled.
+    """
+    scaled_path = None
+    if profile == "still":
+        try:
+            scaled_path = prescale_image(image_path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"Could not pre-scale {image_path}, scaling while encoding: {e}")
+    try:
+        if scaled_path:
+            run(build_command(scaled_path, True))
+        else:
+            run(build_command(image_path, False))
+    finally:
+        if scaled_path and os.path.exists(scaled_path):
+            os.remove(scaled_path)
+
+
+def _run_with_progress(command: list, on_progress: Callable[[Dict[str, str]], None]) -> None:
+    """
+    Runs ffmpeg with `-progress pipe:1` and calls on_progress with every key=value
+    block it reports (out_time_us, speed, progress, ...).
+    """
+    command = command[:2] + ["-progress", "pipe:1", "-nostats"] + command[2:]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    block = {}
+    for line in process.stdout:
+        key, _, value = line.strip().partition("=")
+        if not key:
+            continue
+        block[key] = value.strip()
+        if key == "progress":
+            on_progress(block)
+            block = {}
+    if process.wait() != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+
+def create_video_from_image_and_audio(
+    image_path: str,
+    audio_path: str,
+    output_video_path: str,
+    profile: str = VIDEO_PROFILE,
+    preset: str = VIDEO_PRESET,
+    threads: int = VIDEO_THREADS,
+    audio_codec: str = VIDEO_AUDIO_CODEC,
+    on_progress: Callable[[Dict[str, str]], None] = None,
+) -> None:
+    """
+    Creates a video by combining a static image with an audio file using ffmpeg.
+    
+    The image will be displayed throughout the video while the audio plays in the background.
+    The output video is forced to a resolution of 1920x1080 to ensure it is uploaded as a normal video.
+    If on_progress is given, it receives ffmpeg's progress reports while encoding.
+    """
+    def build_command(image: str, prescaled: bool) -> list:
+        return _video_command(image, audio_path, output_video_path, profile=profile, preset=preset,
+                              threads=threads, audio_codec=audio_codec, prescaled=prescaled)
+
+    def run(command: list) -> None:
+        if on_progress:
+            _run_with_progress(command, on_progress)
+        else:
+            subprocess.run(command, check=True)
+
     try:
-        subprocess.run(command, check=True)
+        _run_with_prescaled_image(image_path, profile, build_command, run)
         logger.info(f"Video successfully created at {output_video_path}")
     except subprocess.CalledProcessError as e:
         logger.error(f"Error creating video: {e}")
         raise
 
+
+def create_video_from_audio_stream(
+    image_path: str,
+    audio_chunks: Iterable[bytes],
+    output_video_path: str,
+    profile: str = VIDEO_PROFILE,
+    threads: int = VIDEO_THREADS,
+) -> None:
+    """
+    Same as create_video_from_image_and_audio, but the MP3 audio is fed to ffmpeg's stdin
+    chunk by chunk, so encoding runs while the audio is still being synthesized.
+    """
+    def build_command(image: str, prescaled: bool) -> list:
+        return _video_command(image, "pipe:0", output_video_path, audio_format="mp3",
+                              profile=profile, threads=threads, prescaled=prescaled)
+
+    def run(command: list) -> None:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        try:
+            for chunk in audio_chunks:
+                process.stdin.write(chunk)
+        except BrokenPipeError:
+            logger.warning("ffmpeg closed its input before the audio stream ended.")
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+        if process.wait() != 0:
+            logger.error(f"Error creating video: ffmpeg exited with {process.returncode}")
+            raise subprocess.CalledProcessError(process.returncode, command)
+
+    _run_with_prescaled_image(image_path, profile, build_command, run)
+    logger.info(f"Video successfully created at {output_video_path}")
+
+
 def upload_video_to_youtube(
     video_path: str, 
     title: str, 
     description: str, 
     tags: list, 
     category_id: str = "22", 
-    privacy_status: str = "public"
+    privacy_status: str = "public",
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
 ) -> str:
     """
     Uploads a video to YouTube using the YouTube Data API.
     
     The video is uploaded as a normal video and marked as made for kids.
     The description is automatically appended with a captivating message about enchanting fairy tales for children.
+    The upload is resumable: it is sent in chunks of chunk_size bytes, and an upload
+    interrupted by a crash continues where it stopped the next time the same file is uploaded.
     """
-    # Determine the directory of the current script to ensure correct file paths when running from cron.
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-
-    # OAuth2 configuration with absolute paths
-    CLIENT_SECRETS_FILE = os.path.join(base_dir, "client_secrets.json")
-    CREDENTIALS_PICKLE_FILE = os.path.join(base_dir, "youtube_credentials.pickle")
-    SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
-
-    creds = None
-    if os.path.exists(CREDENTIALS_PICKLE_FILE):
-        with open(CREDENTIALS_PICKLE_FILE, "rb") as token:
-            creds = pickle.load(token)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRETS_FILE, SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open(CREDENTIALS_PICKLE_FILE, "wb") as token:
-            pickle.dump(creds, token)
-
-    youtube = build("youtube", "v3", credentials=creds)
+    youtube = youtube_session.service()
+    http = youtube_session.http()
 
     # Append engaging info to the description about fairy tales for kids
     description += ("\n\nDiscover a world of magic and adventure with our captivating fairy tales for kids. "
@@ -92,17 +354,144 @@ def upload_video_to_youtube(
         )
     )
 
-    media = MediaFileUpload(video_path, chunksize=-1, resumable=True, mimetype="video/mp4")
-    request = youtube.videos().insert(
-        part="snippet,status",
-        body=body,
-        media_body=media
+    def new_request():
+        media = MediaFileUpload(video_path, chunksize=chunk_size, resumable=True, mimetype="video/mp4")
+        return youtube.videos().insert(
+            part="snippet,status",
+            body=body,
+            media_body=media
+        )
+
+    response = _upload_resumable(new_request, video_path, http)
+    logger.info("Video upload complete!")
+    return response.get("id")
+
+
+def _session_path(video_path: str) -> str:
+    key = hashlib.sha256(f"{os.path.abspath(video_path)}\0{os.path.getsize(video_path)}".encode("utf-8"))
+    return os.path.join(UPLOAD_SESSIONS_DIR, f"{key.hexdigest()}.json")
+
+
+def _load_session(video_path: str) -> Optional[str]:
+    try:
+        with open(_session_path(video_path), "r", encoding="utf-8") as file:
+            return json.load(file)["resumable_uri"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return None
+
+
+def _save_session(video_path: str, resumable_uri: str, progress: int) -> None:
+    os.makedirs(UPLOAD_SESSIONS_DIR, exist_ok=True)
+    path = _session_path(video_path)
+    record = {
+        "video_path": os.path.abspath(video_path),
+        "resumable_uri": resumable_uri,
+        "progress": progress,
+        "updated_at": datetime.now().isoformat(),
+    }
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(record, file)
+    os.replace(path + ".tmp", path)
+
+
+def _remove_session(video_path: str) -> None:
+    try:
+        os.remove(_session_path(video_path))
+    except FileNotFoundError:
+        pass
+
+
+def _query_upload_progress(request, size: int, http: Optional[httplib2.Http] = None) -> Optional[dict]:
+    """
+    Asks YouTube how much of the upload session in request.resumable_uri it has received,
+    with an empty PUT carrying "Content-Range: bytes */<size>", and moves the request's
+    progress there. Returns the upload response if YouTube already has the whole file.
+    """
+    resp, content = (http or request.http).request(
+        request.resumable_uri,
+        method="PUT",
+        headers={"Content-Range": f"bytes */{size}", "Content-Length": "0"},
     )
+    if resp.status in (200, 201):
+        return request.postproc(resp, content)
+    if resp.status != 308:
+        raise HttpError(resp, content, uri=request.resumable_uri)
+    # "Range: bytes=0-<last>" covers what was received; without it nothing was
+    received = resp.get("range")
+    request.resumable_progress = int(received.rsplit("-", 1)[1]) + 1 if received else 0
+    logger.info(f"YouTube already has {request.resumable_progress}/{size} bytes of the upload")
+    return None
+
+
+def _upload_resumable(new_request: Callable, video_path: str, http: Optional[httplib2.Http] = None) -> dict:
+    """
+    Sends the upload chunk by chunk through `http`, retrying each failed chunk with
+    exponential backoff.
+
+    The session URI is saved under UPLOAD_SESSIONS_DIR as soon as YouTube hands it out.
+    If a previous process left a session for the same file, the upload continues from the
+    bytes YouTube already has instead of starting from zero.
+    """
+    request = new_request()
+    size = os.path.getsize(video_path)
+    resumable_uri = _load_session(video_path)
+    if resumable_uri:
+        logger.info(f"Resuming interrupted upload of {video_path}")
+        request.resumable_uri = resumable_uri
+    # A saved session first asks YouTube how many bytes it already has
+    query_progress = resumable_uri is not None
 
     response = None
+    failures = 0
     while response is None:
-        status, response = request.next_chunk()
-        if status:
-            logger.info(f"Uploading video: {int(status.progress() * 100)}% complete")
-    logger.info("Video upload complete!")
-    return response.get("id")
+        sent_before = request.resumable_progress
+        start = time.perf_counter()
+        try:
+            if query_progress:
+                status, response = None, _query_upload_progress(request, size, http)
+                query_progress = False
+            else:
+                status, response = request.next_chunk(http=http, num_retries=0)
+        except HttpError as e:
+            if e.resp.status in EXPIRED_SESSION_STATUS_CODES and request.resumable_uri:
+                logger.warning(f"Upload session expired ({e.resp.status}), starting the upload again.")
+                _remove_session(video_path)
+                request = new_request()
+                query_progress = False
+                failures = 0
+                continue
+            if e.resp.status not in RETRIABLE_STATUS_CODES:
+                raise
+            error = e
+        except RETRIABLE_EXCEPTIONS as e:
+            error = e
+        else:
+            elapsed = time.perf_counter() - start
+            sent = request.resumable_progress - sent_before
+            if sent > 0:
+                # Only real progress resets the retry budget, not the status query after an error
+                failures = 0
+            if response is None and request.resumable_uri:
+                _save_session(video_path, request.resumable_uri, request.resumable_progress)
+            if status:
+                logger.info(
+                    f"Uploading video: {int(status.progress() * 100)}% complete, "
+                    f"{sent / 1e6:.1f} MB at {sent / 1e6 / elapsed if elapsed else 0:.2f} MB/s"
+                )
+            continue
+
+        failures += 1
+        if request.resumable_uri:
+            _save_session(video_path, request.resumable_uri, request.resumable_progress)
+        if failures > UPLOAD_MAX_RETRIES:
+            logger.error(f"Upload of {video_path} failed after {UPLOAD_MAX_RETRIES} retries: {error}")
+            raise error
+        wait = random.uniform(0, min(UPLOAD_MAX_RETRY_DELAY, UPLOAD_RETRY_DELAY * 2 ** failures))
+        logger.warning(
+            f"Upload chunk failed at {request.resumable_progress}/{size} bytes ({error}), "
+            f"retry {failures}/{UPLOAD_MAX_RETRIES} in {wait:.1f} s"
+        )
+        time.sleep(wait)
+
+    _remove_session(video_path)
+    return response
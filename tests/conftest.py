@@ -0,0 +1,15 @@
+import os
+import sys
+import types
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+try:
+    import config  # noqa: F401
+except ImportError:
+    # config.py holds the deployment's credentials and is not part of the repository;
+    # the modules tested without it only need the log level
+    config = types.ModuleType("config")
+    config.LOG_LEVEL = logging.INFO
+    sys.modules["config"] = config
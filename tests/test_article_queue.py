@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from article_queue import ArticleQueue
+
+
+@pytest.fixture
+def article_queue(tmp_path):
+    return ArticleQueue(str(tmp_path / "queue"))
+
+
+def _media_file(tmp_path, name: str) -> str:
+    path = tmp_path / name
+    path.write_bytes(b"media")
+    return str(path)
+
+
+def test_put_moves_files_into_the_queue(article_queue, tmp_path):
+    image_path = _media_file(tmp_path, "image.png")
+
+    article_queue.put({"title": "Pohádka"}, {"image_path": image_path, "video_path": None})
+
+    assert len(article_queue) == 1
+    assert not os.path.exists(image_path)
+    article = article_queue.claim()
+    assert article.values["title"] == "Pohádka"
+    assert article.values["video_path"] is None
+    with open(article.values["image_path"], "rb") as file:
+        assert file.read() == b"media"
+
+
+def test_claim_takes_the_oldest_article_first(article_queue):
+    first = article_queue.put({"title": "first"}, {})
+    second = article_queue.put({"title": "second"}, {})
+
+    assert article_queue.claim().name == first
+    assert article_queue.claim().name == second
+    assert article_queue.claim() is None
+
+
+def test_released_article_can_be_claimed_again(article_queue):
+    article_queue.put({"title": "Pohádka"}, {})
+    article = article_queue.claim()
+
+    article_queue.release(article)
+
+    assert len(article_queue) == 1
+    assert article_queue.claim().name == article.name
+
+
+def test_completed_article_is_removed(article_queue, tmp_path):
+    article_queue.put({"title": "Pohádka"}, {"image_path": _media_file(tmp_path, "image.png")})
+    article = article_queue.claim()
+
+    article_queue.complete(article.name)
+
+    assert not os.path.exists(article.path)
+    assert len(article_queue) == 0
@@ -0,0 +1,42 @@
+import random
+
+from combo_sampler import ComboSampler
+
+ANIMALS = ["Liška", "Jezevec", "Sova"]
+MOODS = ["veselá", "smutná"]
+
+
+def test_draws_every_unused_combination_once():
+    sampler = ComboSampler(ANIMALS, MOODS, lambda identifier: False, rng=random.Random(1))
+
+    drawn = [sampler.draw() for _ in range(sampler.total)]
+
+    assert sorted(drawn) == sorted((animal, mood) for animal in ANIMALS for mood in MOODS)
+    assert sampler.draw() is None
+    assert sampler.remaining == 0
+
+
+def test_used_combinations_are_never_drawn():
+    used = {"Liška|veselá", "Sova|smutná"}
+    sampler = ComboSampler(ANIMALS, MOODS, used.__contains__, rng=random.Random(1))
+
+    drawn = {f"{animal}|{mood}" for animal, mood in iter(sampler.draw, None)}
+
+    assert sampler.total == 6
+    assert drawn.isdisjoint(used)
+    assert len(drawn) == 4
+
+
+def test_discard_and_restore():
+    sampler = ComboSampler(["Liška"], MOODS, lambda identifier: False)
+
+    sampler.discard("Liška", "veselá")
+    sampler.discard("Liška", "veselá")
+    assert sampler.remaining == 1
+    assert sampler.draw() == ("Liška", "smutná")
+
+    sampler.restore("Liška", "smutná")
+    sampler.restore("Liška", "smutná")
+    sampler.restore("Medvěd", "veselá")
+    assert sampler.remaining == 1
+    assert sampler.draw() == ("Liška", "smutná")
@@ -0,0 +1,106 @@
+import pytest
+
+from job_store import JOB_STATES, JobStore
+
+GENERATED = {"story": "<p>story</p>", "image_path": "image.png", "audio_path": "audio.mp3"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs"))
+
+
+def test_new_job_is_created(store):
+    job = store.create()
+
+    assert job.state == "created"
+    assert not job.finished
+
+
+def test_state_follows_recorded_values(store):
+    job = store.create()
+
+    job.record("story", {"story": GENERATED["story"]})
+    assert job.state == "created"
+    job.record("media", {"image_path": GENERATED["image_path"], "audio_path": GENERATED["audio_path"]})
+    assert job.state == "generated"
+    job.record("upload_image", {"image_attachment_id": 1})
+    job.record("upload_audio", {"audio_html": ""})
+    job.record("post", {"post": {"id": 2, "link": None}})
+    assert job.state == "posted"
+
+
+def test_state_stops_at_the_first_missing_requirement(store):
+    job = store.create()
+
+    # A later state's value does not count while an earlier one is missing
+    job.record("youtube", {"youtube_video_id": "abc"})
+    job.record("generate", GENERATED)
+
+    assert job.state == "generated"
+
+
+def test_none_values_are_not_recorded(store):
+    job = store.create()
+
+    job.record("video", {"video_path": None})
+
+    assert "video_path" not in job.values
+
+
+def test_job_with_every_value_is_finished(store):
+    job = store.create()
+
+    job.record("all", {
+        **GENERATED,
+        "image_attachment_id": 1,
+        "audio_html": "",
+        "post": {"id": 2},
+        "video_path": "video.mp4",
+        "youtube_video_id": "abc",
+    })
+
+    assert job.state == JOB_STATES[-1]
+    assert job.finished
+
+
+def test_recorded_values_are_persisted(store):
+    job = store.create()
+    job.record("generate", GENERATED)
+
+    loaded = store.load(job.id)
+
+    assert loaded.values == GENERATED
+    assert loaded.state == "generated"
+
+
+def test_unfinished_lists_jobs_that_are_not_finished(store):
+    unfinished = store.create()
+    unfinished.record("generate", GENERATED)
+    finished = store.create()
+    finished.record("all", {
+        **GENERATED,
+        "image_attachment_id": 1,
+        "audio_html": "",
+        "post": {"id": 2},
+        "video_path": "video.mp4",
+        "youtube_video_id": "abc",
+    })
+
+    assert [job.id for job in store.unfinished()] == [unfinished.id]
+
+
+def test_unreadable_records_are_skipped(store, tmp_path):
+    job = store.create()
+    (tmp_path / "jobs" / "broken.json").write_text("{", encoding="utf-8")
+
+    assert [loaded.id for loaded in store.unfinished()] == [job.id]
+
+
+def test_removed_job_is_gone(store):
+    job = store.create()
+
+    store.remove(job)
+    store.remove(job)
+
+    assert store.unfinished() == []
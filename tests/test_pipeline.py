@@ -0,0 +1,187 @@
+import threading
+import time
+
+import pytest
+
+from pipeline import PipelineError, Stage, provider_limits, run_pipeline
+
+
+def test_values_flow_through_dependent_stages():
+    stages = [
+        Stage("double", lambda x: x * 2, inputs=("x",), outputs=("doubled",)),
+        Stage("pair", lambda doubled: (doubled, doubled + 1), inputs=("doubled",), outputs=("a", "b")),
+    ]
+
+    result = run_pipeline(stages, initial={"x": 3})
+
+    assert result.values == {"x": 3, "doubled": 6, "a": 6, "b": 7}
+    assert set(result.timings) == {"double", "pair"}
+    assert result.failed == {}
+
+
+def test_independent_stages_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_for_other() -> bool:
+        barrier.wait()
+        return True
+
+    stages = [
+        Stage("left", wait_for_other, outputs=("left",)),
+        Stage("right", wait_for_other, outputs=("right",)),
+    ]
+
+    result = run_pipeline(stages)
+
+    assert result.values == {"left": True, "right": True}
+
+
+def test_required_failure_raises_and_stops_downstream_stages():
+    called = []
+
+    def fail(one):
+        raise ValueError("boom")
+
+    stages = [
+        Stage("ok", lambda: 1, outputs=("one",)),
+        Stage("broken", fail, inputs=("one",), outputs=("two",)),
+        Stage("after", lambda two: called.append(two), inputs=("two",), outputs=("three",)),
+    ]
+
+    with pytest.raises(PipelineError) as excinfo:
+        run_pipeline(stages)
+
+    assert excinfo.value.stage == "broken"
+    assert isinstance(excinfo.value.error, ValueError)
+    assert excinfo.value.values["one"] == 1
+    assert called == []
+
+
+def test_optional_failure_sets_outputs_to_none():
+    def fail():
+        raise RuntimeError("no video")
+
+    stages = [
+        Stage("video", fail, outputs=("video_path",), optional=True),
+        Stage("upload", lambda video_path: video_path is None, inputs=("video_path",), outputs=("skipped",)),
+    ]
+
+    result = run_pipeline(stages)
+
+    assert result.values == {"video_path": None, "skipped": True}
+    assert isinstance(result.failed["video"], RuntimeError)
+
+
+def test_wrong_number_of_outputs_fails_the_stage():
+    stages = [Stage("pair", lambda: (1, 2, 3), outputs=("a", "b"))]
+
+    with pytest.raises(PipelineError) as excinfo:
+        run_pipeline(stages)
+
+    assert isinstance(excinfo.value.error, ValueError)
+
+
+def test_emitted_values_start_downstream_before_the_stage_finishes():
+    consumed = threading.Event()
+
+    def produce(emit):
+        emit(title="early")
+        # Only returns once the downstream stage has run on the emitted value
+        assert consumed.wait(timeout=5)
+        return "story"
+
+    def consume(title):
+        consumed.set()
+        return title.upper()
+
+    stages = [
+        Stage("story", produce, outputs=("story",), emits=("title",)),
+        Stage("image", consume, inputs=("title",), outputs=("image",)),
+    ]
+
+    result = run_pipeline(stages)
+
+    assert result.values == {"title": "early", "story": "story", "image": "EARLY"}
+
+
+def test_emitting_an_undeclared_value_fails_the_stage():
+    stages = [Stage("story", lambda emit: emit(unknown=1), outputs=("story",), emits=("title",))]
+
+    with pytest.raises(PipelineError) as excinfo:
+        run_pipeline(stages)
+
+    assert isinstance(excinfo.value.error, ValueError)
+
+
+def test_stages_with_available_outputs_are_skipped():
+    called = []
+    stages = [
+        Stage("story", lambda: called.append("story"), outputs=("story",)),
+        Stage("post", lambda story: story + "!", inputs=("story",), outputs=("post",)),
+    ]
+
+    result = run_pipeline(stages, initial={"story": "resumed"})
+
+    assert called == []
+    assert result.values["post"] == "resumed!"
+    assert "story" not in result.timings
+
+
+def test_stages_without_outputs_always_run():
+    called = []
+    stages = [Stage("side_effect", lambda: called.append(True))]
+
+    run_pipeline(stages, initial={"anything": 1})
+
+    assert called == [True]
+
+
+def test_on_values_receives_emitted_and_produced_values():
+    recorded = []
+
+    def produce(emit):
+        emit(title="t")
+        return "s"
+
+    stages = [Stage("story", produce, outputs=("story",), emits=("title",))]
+
+    run_pipeline(stages, on_values=lambda stage, values: recorded.append((stage, values)))
+
+    assert recorded == [("story", {"title": "t"}), ("story", {"story": "s"})]
+
+
+def test_provider_limit_caps_concurrent_stages():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def call():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return True
+
+    stages = [Stage(f"call{index}", call, outputs=(f"out{index}",), provider="api") for index in range(4)]
+
+    run_pipeline(stages, limits=provider_limits({"api": 1}))
+
+    assert peak == 1
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError, match="no producer"):
+        run_pipeline([Stage("post", lambda story: story, inputs=("story",), outputs=("post",))])
+    with pytest.raises(ValueError, match="more than once"):
+        run_pipeline([
+            Stage("a", lambda: 1, outputs=("x",)),
+            Stage("b", lambda: 2, outputs=("x",)),
+        ])
+    with pytest.raises(ValueError, match="Duplicate stage name"):
+        run_pipeline([
+            Stage("a", lambda: 1, outputs=("x",)),
+            Stage("a", lambda: 2, outputs=("y",)),
+        ])
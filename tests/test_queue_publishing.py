@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+# main imports every provider client and needs the full config.py
+main = pytest.importorskip("main")
+ai_content_generator = pytest.importorskip("ai_content_generator")
+
+from article_queue import ArticleQueue
+from artifact_store import ArtifactStore
+from identifier_locks import IdentifierLocks
+from job_store import JobStore
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    artifact_store = ArtifactStore(str(tmp_path / "artifacts"))
+    monkeypatch.setattr(ai_content_generator, "HISTORY_DB_PATH", str(tmp_path / "selected_animals.sqlite3"))
+    monkeypatch.setattr(ai_content_generator, "HISTORY_FILE_PATH", str(tmp_path / "selected_animals.json"))
+    monkeypatch.setattr(ai_content_generator, "_history_store", None)
+    monkeypatch.setattr(ai_content_generator, "artifact_store", artifact_store)
+    monkeypatch.setattr(ai_content_generator, "identifier_locks", IdentifierLocks(str(tmp_path / "reservations")))
+    monkeypatch.setattr(main, "artifact_store", artifact_store)
+    monkeypatch.setattr(main, "job_store", JobStore(str(tmp_path / "jobs")))
+    monkeypatch.setattr(main, "article_queue", ArticleQueue(str(tmp_path / "queue")))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _stub_generation(monkeypatch, workdir):
+    def media_file(name):
+        path = workdir / name
+        path.write_bytes(b"media")
+        return str(path)
+
+    def generate_story(emit, stream=True, self_edit=False):
+        emit(animal="Liška", mood="veselá", title="Pohádka")
+        return "Liška|veselá", "<p>draft</p>"
+
+    monkeypatch.setattr(main, "_generate_story", generate_story)
+    monkeypatch.setattr(main, "_validate_story", lambda identifier, draft_story, mode="full": "<p>story</p>")
+    monkeypatch.setattr(main, "_generate_image", lambda animal, mood, title: media_file("image.png"))
+    monkeypatch.setattr(main, "_generate_audio", lambda story, limit=None: media_file("audio.mp3"))
+    monkeypatch.setattr(main, "_create_video", lambda image_path, audio_path: media_file("video.mp4"))
+
+
+def test_queued_article_failing_after_an_upload_is_finished_by_resume(workdir, monkeypatch):
+    _stub_generation(monkeypatch, workdir)
+    assert main.generate_article()
+
+    post_attempts = []
+
+    def create_post(wordpress, title, story, audio_html, image_attachment_id):
+        post_attempts.append(title)
+        if len(post_attempts) == 1:
+            raise RuntimeError("WordPress is down")
+        return {"id": 7, "link": None}
+
+    monkeypatch.setattr(main, "_upload_image", lambda wordpress, image_path: (5, "image-url"))
+    monkeypatch.setattr(main, "_upload_audio", lambda wordpress, audio_path: "[audio]")
+    monkeypatch.setattr(main, "_create_post", create_post)
+    monkeypatch.setattr(main, "_upload_video", lambda post, video_path, title, story: "youtube-id")
+    wordpress = object()
+
+    assert main.publish_queued_article(wordpress) is False
+    # The image was uploaded, so the article stays claimed for --resume
+    assert len(main.article_queue) == 0
+    assert os.listdir(workdir / "queue" / "claimed")
+
+    jobs = main.hold_unfinished_jobs()
+    assert len(jobs) == 1
+    assert main.post_ai_article(wordpress, job=jobs[0])
+
+    assert post_attempts == ["Pohádka", "Pohádka"]
+    assert main.job_store.unfinished() == []
+    assert os.listdir(workdir / "queue" / "claimed") == []
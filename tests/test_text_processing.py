@@ -0,0 +1,60 @@
+import pytest
+
+# Both modules construct their API clients on import and need the full config.py
+elevenlabs_client = pytest.importorskip("elevenlabs_client")
+ai_content_generator = pytest.importorskip("ai_content_generator")
+
+
+def test_split_text_keeps_short_text_whole():
+    assert elevenlabs_client.split_text("Krátký text.", max_chars=100) == ["Krátký text."]
+
+
+def test_split_text_prefers_paragraph_boundaries():
+    text = "První odstavec.\n\nDruhý odstavec."
+
+    assert elevenlabs_client.split_text(text, max_chars=20) == ["První odstavec.", "Druhý odstavec."]
+
+
+def test_split_text_splits_long_paragraphs_at_sentences():
+    text = "Jedna věta tady. Druhá věta tady. Třetí věta tady."
+
+    chunks = elevenlabs_client.split_text(text, max_chars=35)
+
+    assert chunks == ["Jedna věta tady. Druhá věta tady.", "Třetí věta tady."]
+    assert all(len(chunk) <= 35 for chunk in chunks)
+
+
+def test_split_text_splits_overlong_sentences_between_words():
+    text = " ".join(["slovo"] * 30)
+
+    chunks = elevenlabs_client.split_text(text, max_chars=40)
+
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert " ".join(chunks) == text
+
+
+def test_split_text_of_empty_text():
+    assert elevenlabs_client.split_text("  \n\n  ") == []
+
+
+def test_apply_corrections_replaces_first_occurrences_in_order():
+    corrections = [
+        {"find": "liška", "replace": "lištička"},
+        {"find": "lištička šla", "replace": "lištička běžela"},
+    ]
+
+    corrected = ai_content_generator.apply_corrections("liška šla, liška spala", corrections)
+
+    assert corrected == "lištička běžela, liška spala"
+
+
+def test_apply_corrections_skips_text_that_is_not_found():
+    corrections = [{"find": "medvěd", "replace": "vlk"}]
+
+    assert ai_content_generator.apply_corrections("liška šla", corrections) == "liška šla"
+
+
+def test_parse_corrections_accepts_code_blocks_and_drops_invalid_entries():
+    answer = '```json\n{"corrections": [{"find": "a", "replace": "b"}, {"find": "", "replace": "c"}, {"x": 1}]}\n```'
+
+    assert ai_content_generator._parse_corrections(answer) == [{"find": "a", "replace": "b"}]
@@ -0,0 +1,144 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+pytest.importorskip("googleapiclient.http")
+pytest.importorskip("google_auth_httplib2")
+
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.http import HttpRequest, MediaFileUpload
+from googleapiclient.model import JsonModel
+
+import youtube_uploader
+
+CHUNK_SIZE = 256 * 1024
+VIDEO_SIZE = 2 * CHUNK_SIZE + 1000
+
+
+class _ResumableUploadHandler(BaseHTTPRequestHandler):
+    """Answers like YouTube's resumable upload endpoint."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Location", f"http://127.0.0.1:{self.server.server_port}/session")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/session":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        span, _, total = self.headers["Content-Range"].split(" ", 1)[1].partition("/")
+        if span != "*":
+            first = int(span.partition("-")[0])
+            assert first == len(self.server.received)
+            self.server.chunk_offsets.append(first)
+            self.server.received += body
+        if len(self.server.received) == int(total):
+            content = json.dumps({"id": "vid123"}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+        self.send_response(308)
+        if self.server.received:
+            self.send_header("Range", f"bytes=0-{len(self.server.received) - 1}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def upload_server():
+    server = HTTPServer(("127.0.0.1", 0), _ResumableUploadHandler)
+    server.received = bytearray()
+    server.chunk_offsets = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def video_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(youtube_uploader, "UPLOAD_SESSIONS_DIR", str(tmp_path / "sessions"))
+    monkeypatch.setattr(youtube_uploader, "UPLOAD_RETRY_DELAY", 0)
+    path = tmp_path / "video.mp4"
+    path.write_bytes(bytes(index % 251 for index in range(VIDEO_SIZE)))
+    return str(path)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = youtube_uploader.YouTubeSession()
+    monkeypatch.setattr(session, "credentials", AnonymousCredentials)
+    return session
+
+
+def _request_factory(server, video_path):
+    def new_request():
+        media = MediaFileUpload(video_path, chunksize=CHUNK_SIZE, resumable=True, mimetype="video/mp4")
+        return HttpRequest(
+            None,
+            JsonModel().response,
+            f"http://127.0.0.1:{server.server_port}/upload?uploadType=resumable",
+            method="POST",
+            body="{}",
+            headers={"content-type": "application/json"},
+            resumable=media,
+        )
+    return new_request
+
+
+def test_multi_chunk_upload_completes(upload_server, video_path, session):
+    response = youtube_uploader._upload_resumable(
+        _request_factory(upload_server, video_path), video_path, session.http()
+    )
+
+    assert response == {"id": "vid123"}
+    assert upload_server.chunk_offsets == [0, CHUNK_SIZE, 2 * CHUNK_SIZE]
+    with open(video_path, "rb") as file:
+        assert bytes(upload_server.received) == file.read()
+
+
+def test_upload_resumes_a_saved_session(upload_server, video_path, session):
+    with open(video_path, "rb") as file:
+        upload_server.received += file.read(CHUNK_SIZE)
+    youtube_uploader._save_session(
+        video_path, f"http://127.0.0.1:{upload_server.server_port}/session", CHUNK_SIZE
+    )
+
+    response = youtube_uploader._upload_resumable(
+        _request_factory(upload_server, video_path), video_path, session.http()
+    )
+
+    assert response == {"id": "vid123"}
+    # Only the bytes the server did not have yet were sent
+    assert upload_server.chunk_offsets == [CHUNK_SIZE, 2 * CHUNK_SIZE]
+    with open(video_path, "rb") as file:
+        assert bytes(upload_server.received) == file.read()
+    assert youtube_uploader._load_session(video_path) is None
+
+
+def test_expired_session_starts_the_upload_again(upload_server, video_path, session):
+    youtube_uploader._save_session(
+        video_path, f"http://127.0.0.1:{upload_server.server_port}/expired", CHUNK_SIZE
+    )
+
+    response = youtube_uploader._upload_resumable(
+        _request_factory(upload_server, video_path), video_path, session.http()
+    )
+
+    assert response == {"id": "vid123"}
+    assert upload_server.chunk_offsets == [0, CHUNK_SIZE, 2 * CHUNK_SIZE]